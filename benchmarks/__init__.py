@@ -0,0 +1,3 @@
+"""
+Headless benchmarks for the scripts in ../scripts, run against a stand-in bpy (see fake_bpy.py).
+"""
@@ -0,0 +1,247 @@
+"""
+Minimal stand-in for the parts of bpy, bmesh and mathutils the scripts use, so they can be timed headless.
+
+Mesh data is kept in NumPy arrays in the same layout Blender uses (float32 coordinates, int32 indices), so
+foreach_get / foreach_set cost a copy just like in Blender, while per-element access goes through small
+proxy objects. Call install() before importing any of the scripts.
+"""
+import sys
+import types
+
+import numpy as np
+
+
+class Element:
+    """ One vertex, edge, loop or polygon; attribute access reads and writes the owning collection """
+    __slots__ = ("collection", "index")
+
+    def __init__(self, collection, index):
+        object.__setattr__(self, "collection", collection)
+        object.__setattr__(self, "index", index)
+
+    def __getattr__(self, name):
+        try:
+            value = self.collection.attributes[name][self.index]
+        except KeyError:
+            raise AttributeError(name) from None
+        return tuple(value.tolist()) if np.ndim(value) else value.item()
+
+    def __setattr__(self, name, value):
+        self.collection.attributes[name][self.index] = value
+
+
+class Collection:
+    """ A mesh element collection (vertices, edges, ...) backed by one NumPy array per attribute """
+    def __init__(self, **attributes):
+        self.layout = attributes
+        self.attributes = {name: np.zeros((0,) + shape, dtype) for name, (dtype, shape) in attributes.items()}
+        self.bl_rna = types.SimpleNamespace(properties={
+            name: types.SimpleNamespace(is_readonly=False) for name in attributes})
+
+    def __len__(self):
+        return len(next(iter(self.attributes.values())))
+
+    def __iter__(self):
+        return (Element(self, i) for i in range(len(self)))
+
+    def __getitem__(self, index):
+        return Element(self, index)
+
+    def add(self, count):
+        for name, (dtype, shape) in self.layout.items():
+            self.attributes[name] = np.concatenate((self.attributes[name], np.zeros((count,) + shape, dtype)))
+
+    def foreach_get(self, name, buffer):
+        buffer[...] = self.attributes[name].reshape(-1)
+
+    def foreach_set(self, name, buffer):
+        self.attributes[name][...] = np.asarray(buffer).reshape(self.attributes[name].shape)
+
+
+class Mesh:
+    def __init__(self, name="Mesh"):
+        self.name = name
+        self.vertices = Collection(co=(np.float32, (3,)), select=(bool, ()))
+        self.edges = Collection(vertices=(np.int32, (2,)), select=(bool, ()))
+        self.loops = Collection(vertex_index=(np.int32, ()), edge_index=(np.int32, ()))
+        self.polygons = Collection(loop_start=(np.int32, ()), loop_total=(np.int32, ()), select=(bool, ()))
+
+    def clear_geometry(self):
+        self.__init__(self.name)
+
+    def update(self, calc_edges=False):
+        if not calc_edges or not len(self.polygons):
+            return
+
+        # Edges of every polygon, merged with the existing ones, as Blender does
+        loop_verts = self.loops.attributes["vertex_index"].astype(np.int64)
+        starts = self.polygons.attributes["loop_start"].astype(np.int64)
+        totals = self.polygons.attributes["loop_total"].astype(np.int64)
+        following = np.arange(len(loop_verts)) + 1
+        following[starts + totals - 1] = starts
+        pairs = np.sort(np.stack((loop_verts, loop_verts[following]), axis=1), axis=1)
+        existing = np.sort(self.edges.attributes["vertices"].astype(np.int64), axis=1)
+        all_pairs = np.concatenate((existing, pairs))
+        stride = int(all_pairs.max()) + 1
+        keys, inverse = np.unique(all_pairs[:, 0] * stride + all_pairs[:, 1], return_inverse=True)
+
+        select = np.zeros(len(keys), dtype=bool)
+        select[inverse[:len(existing)]] = self.edges.attributes["select"]
+        edges = np.stack((keys // stride, keys % stride), axis=1).astype(np.int32)
+        self.edges.attributes = {"vertices": edges, "select": select}
+        self.loops.attributes["edge_index"][:] = inverse.reshape(-1)[len(existing):]
+
+
+class Object:
+    def __init__(self, name, data):
+        self.name = name
+        self.name_full = name
+        self.data = data
+        self.type = 'MESH'
+        self.mode = 'OBJECT'
+        self.original = self
+        # no vertex groups are ever created here
+        self.vertex_groups = types.SimpleNamespace(get=lambda name: None)
+
+    def update_from_editmode(self):
+        # Blender converts the whole edit mesh back into the mesh data; charge a copy of every buffer for it
+        for collection in (self.data.vertices, self.data.edges, self.data.loops, self.data.polygons):
+            for values in collection.attributes.values():
+                values.copy()
+        return True
+
+
+class Operator:
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Properties are declared as annotations; expose their defaults as plain attributes
+        for name, value in cls.__dict__.get("__annotations__", {}).items():
+            setattr(cls, name, value)
+
+    def report(self, level, message):
+        self.reports = getattr(self, "reports", []) + [(level, message)]
+
+
+def _property(**kwargs):
+    return kwargs.get("default")
+
+
+class _Menu:
+    @staticmethod
+    def append(func):
+        pass
+
+    @staticmethod
+    def remove(func):
+        pass
+
+
+class Context(types.SimpleNamespace):
+    @property
+    def objects_in_mode_unique_data(self):
+        # only the active object is ever put in edit mode here
+        obj = self.active_object
+        return [obj] if obj is not None and obj.mode == 'EDIT' else []
+
+
+context = Context(
+    active_object=None,
+    collection=types.SimpleNamespace(objects=types.SimpleNamespace(link=lambda obj: None)),
+    view_layer=types.SimpleNamespace(objects=types.SimpleNamespace(active=None)),
+)
+
+
+class BMVert:
+    __slots__ = ("mesh", "index")
+
+    def __init__(self, mesh, index):
+        self.mesh = mesh
+        self.index = index
+
+    @property
+    def co(self):
+        return tuple(self.mesh.vertices.attributes["co"][self.index].tolist())
+
+    @co.setter
+    def co(self, value):
+        self.mesh.vertices.attributes["co"][self.index] = value
+
+
+class BMVertSeq:
+    def __init__(self, mesh):
+        self.mesh = mesh
+        self.layers = types.SimpleNamespace(deform=types.SimpleNamespace(active=None))
+
+    def __getitem__(self, index):
+        return BMVert(self.mesh, index)
+
+    def ensure_lookup_table(self):
+        pass
+
+    def index_update(self):
+        pass
+
+
+class BMesh:
+    """ The edit mesh of one mesh; only its vertices are written through """
+    def __init__(self, mesh):
+        self.mesh = mesh
+        self.verts = BMVertSeq(mesh)
+
+
+class Vector(tuple):
+    def __new__(cls, values):
+        return super().__new__(cls, (float(v) for v in values))
+
+    def __add__(self, other):
+        return Vector(np.add(self, other))
+
+    def __sub__(self, other):
+        return Vector(np.subtract(self, other))
+
+    def __rsub__(self, other):
+        return Vector(np.subtract(other, self))
+
+    def __mul__(self, other):
+        return Vector(np.multiply(self, other))
+
+    __radd__ = __add__
+    __rmul__ = __mul__
+
+    def dot(self, other):
+        return float(np.dot(self, other))
+
+
+def install():
+    """
+    Registers the stand-in bpy, bmesh and mathutils modules in sys.modules.
+
+    :return: The stand-in bpy module
+    """
+    bpy = types.ModuleType("bpy")
+    bpy.context = context
+    bpy.app = types.SimpleNamespace(
+        driver_namespace={},
+        handlers=types.SimpleNamespace(depsgraph_update_post=[], load_pre=[], persistent=lambda func: func),
+        timers=types.SimpleNamespace(register=lambda func, first_interval=0: None, unregister=lambda func: None,
+                                     is_registered=lambda func: False),
+    )
+    bpy.types = types.SimpleNamespace(Operator=Operator, VIEW3D_MT_edit_mesh_vertices=_Menu, VIEW3D_MT_object=_Menu)
+    bpy.props = types.SimpleNamespace(FloatProperty=_property, IntProperty=_property, BoolProperty=_property,
+                                      EnumProperty=_property, StringProperty=_property,
+                                      FloatVectorProperty=_property)
+    bpy.data = types.SimpleNamespace(
+        meshes=types.SimpleNamespace(new=lambda name: Mesh(name)),
+        objects=types.SimpleNamespace(new=lambda name, data: Object(name, data), get=lambda name: None),
+    )
+    bpy.utils = types.SimpleNamespace(register_class=lambda cls: None, unregister_class=lambda cls: None)
+
+    bmesh = types.ModuleType("bmesh")
+    bmesh.from_edit_mesh = BMesh
+    bmesh.update_edit_mesh = lambda mesh, loop_triangles=True, destructive=True: None
+
+    mathutils = types.ModuleType("mathutils")
+    mathutils.Vector = Vector
+
+    sys.modules.update(bpy=bpy, bmesh=bmesh, mathutils=mathutils)
+    return bpy
@@ -0,0 +1,141 @@
+"""
+Synthetic meshes for the benchmarks, built directly into stand-in mesh buffers.
+"""
+import numpy as np
+
+from benchmarks import fake_bpy
+
+
+def mesh_object(name, coords, edges=(), loop_starts=(), loop_totals=(), loop_verts=(), select=True):
+    """
+    Creates a stand-in mesh object from flat buffers.
+
+    :param name: Object name
+    :param coords: (N, 3) vertex coordinates
+    :param edges: (E, 2) vertex index pairs
+    :param loop_starts: (F,) start of each polygon in loop_verts
+    :param loop_totals: (F,) vertex count of each polygon
+    :param loop_verts: (L,) vertex indices of all polygons
+    :param select: Whether every vertex and edge starts out selected
+    :return: fake_bpy.Object
+    """
+    mesh = fake_bpy.Mesh(name)
+    mesh.vertices.add(len(coords))
+    mesh.vertices.attributes["co"][:] = coords
+    mesh.vertices.attributes["select"][:] = select
+    if len(edges):
+        mesh.edges.add(len(edges))
+        mesh.edges.attributes["vertices"][:] = edges
+        mesh.edges.attributes["select"][:] = select
+    if len(loop_starts):
+        mesh.loops.add(len(loop_verts))
+        mesh.loops.attributes["vertex_index"][:] = loop_verts
+        mesh.polygons.add(len(loop_starts))
+        mesh.polygons.attributes["loop_start"][:] = loop_starts
+        mesh.polygons.attributes["loop_total"][:] = loop_totals
+        mesh.update(calc_edges=True)
+    return fake_bpy.Object(name, mesh)
+
+
+def path_edges(count):
+    """
+    :param count: Number of vertices
+    :return: (count - 1, 2) edges joining vertex i to vertex i + 1
+    """
+    return np.stack((np.arange(count - 1), np.arange(1, count)), axis=1)
+
+
+def polyline(count, seed=0):
+    """
+    A noisy, roughly straight run of edges along X, shuffled so edge order does not follow the path.
+
+    :param count: Number of vertices
+    :param seed: Random seed
+    :return: fake_bpy.Object with every element selected
+    """
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 10, count)
+    coords = np.stack((x, 0.1 * rng.standard_normal(count), 0.1 * rng.standard_normal(count)), axis=1)
+    edges = path_edges(count)[rng.permutation(count - 1)]
+    return mesh_object("Polyline", coords, edges)
+
+
+def zigzag(count, amplitude=0.5):
+    """
+    A run of edges alternating up and down along X.
+
+    :param count: Number of vertices
+    :param amplitude: Height of every zig
+    :return: fake_bpy.Object with every element selected
+    """
+    x = np.linspace(0, 10, count)
+    y = np.where(np.arange(count) % 2, amplitude, -amplitude)
+    return mesh_object("Zigzag", np.stack((x, y, np.zeros(count)), axis=1), path_edges(count))
+
+
+def strands(count, length=200, seed=0):
+    """
+    Many separate noisy runs of edges side by side, like edge loops picked on a retopology mesh.
+
+    :param count: Number of vertices
+    :param length: Vertices per run
+    :param seed: Random seed
+    :return: fake_bpy.Object with every element selected
+    """
+    rng = np.random.default_rng(seed)
+    length = max(min(length, count), 3)
+    runs = max(count // length, 1)
+    x = np.tile(np.linspace(0, 10, length), runs)
+    y = np.repeat(np.arange(runs, dtype=np.float64), length)
+    coords = np.stack((x, y, 0.1 * rng.standard_normal(x.size)), axis=1)
+    path = path_edges(length)
+    edges = (path[np.newaxis] + length * np.arange(runs)[:, np.newaxis, np.newaxis]).reshape(-1, 2)
+    return mesh_object("Strands", coords, edges[rng.permutation(len(edges))])
+
+
+def subdivided_plane(count, size=40.0):
+    """
+    A square grid of quads in the XY plane, centred on the origin.
+
+    :param count: Approximate number of vertices
+    :param size: Width of the plane
+    :return: fake_bpy.Object
+    """
+    cuts = max(int(round(np.sqrt(count))) - 1, 1)
+    xs = np.linspace(-size / 2, size / 2, cuts + 1)
+    x, y = np.meshgrid(xs, xs, indexing='ij')
+    coords = np.stack((x.ravel(), y.ravel(), np.zeros(x.size)), axis=1)
+
+    grid = np.arange((cuts + 1) ** 2).reshape(cuts + 1, cuts + 1)
+    quads = np.stack((grid[:-1, :-1], grid[1:, :-1], grid[1:, 1:], grid[:-1, 1:]), axis=-1).reshape(-1, 4)
+    return mesh_object("Plane", coords, loop_starts=4 * np.arange(len(quads)), loop_totals=np.full(len(quads), 4),
+                       loop_verts=quads.ravel(), select=False)
+
+
+def plane_row(count, selected=20):
+    """
+    A subdivided plane with a short run of edges selected along one row, as when cleaning up a few vertices
+    of a large mesh; the cost should follow the selection rather than the plane.
+
+    :param count: Approximate number of vertices
+    :param selected: Number of selected vertices
+    :return: fake_bpy.Object
+    """
+    obj = subdivided_plane(count)
+    mesh = obj.data
+    coords = mesh.vertices.attributes["co"]
+    row = np.flatnonzero(np.isclose(coords[:, 0], coords[:, 0].min()))[:selected]
+    coords[row[1:-1], 2] += np.float32(0.1)
+    picked = np.isin(mesh.edges.attributes["vertices"], row).all(axis=1)
+    mesh.edges.attributes["select"][picked] = True
+    mesh.vertices.attributes["select"][row] = True
+    return obj
+
+
+GENERATORS = {
+    "polyline": polyline,
+    "zigzag": zigzag,
+    "strands": strands,
+    "plane": subdivided_plane,
+    "plane_row": plane_row,
+}
@@ -0,0 +1,259 @@
+"""
+Times the GT operators and the stereographic projection headless, against the stand-in bpy.
+
+    python -m benchmarks.run --sizes 10 1000 100000 --output results.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json
+
+Results are written as JSON. With --baseline, every timing is compared to the stored one and the run exits
+with status 1 if any of them is slower by more than the tolerance.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+from benchmarks import fake_bpy
+from benchmarks.generators import GENERATORS
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+
+DEFAULT_SIZES = [10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+
+def load_scripts():
+    """
+    Installs the stand-in modules and imports the scripts.
+
+    :return: Dict of module name -> module
+    """
+    bpy = fake_bpy.install()
+    if SCRIPTS_DIR not in sys.path:
+        sys.path.insert(0, SCRIPTS_DIR)
+    # projection.py runs against the active object on import; there is none yet
+    bpy.context.active_object = None
+    names = ("GT_straighten_1_1", "GT_curve_1_1", "GT_fair_1_0", "projection", "GT_stereographic_live_1_0")
+    return {name: importlib.import_module(name) for name in names}
+
+
+def chain_cache(module):
+    """
+    :return: The module-level ChainCache of an operator script
+    """
+    return getattr(module, "line_cache", None) or getattr(module, "lineCache")
+
+
+def run_operator(module, operator, obj, mode, **properties):
+    """
+    :return: Function that resets obj and runs the operator once on it, with a cold chain cache
+    """
+    original = obj.data.vertices.attributes["co"].copy()
+
+    def run():
+        obj.data.vertices.attributes["co"][:] = original
+        obj.mode = mode
+        fake_bpy.context.active_object = obj
+        chain_cache(module).entries.clear()
+        op = operator()
+        for name, value in properties.items():
+            setattr(op, name, value)
+        op.execute(fake_bpy.context)
+    return run
+
+
+def run_redo(module, operator, obj, mode, name="bulgeAmt", values=(0.3, 3.0)):
+    """
+    :return: Function that re-runs an operator with a new value of one property on an unchanged selection, as
+             the redo panel does (by default Curvify with a new bulge)
+    """
+    original = obj.data.vertices.attributes["co"].copy()
+    first = run_operator(module, operator, obj, mode)
+    first()
+    value = iter(np.linspace(*values, 1000).tolist())
+
+    def run():
+        obj.data.vertices.attributes["co"][:] = original
+        op = operator()
+        setattr(op, name, next(value))
+        op.execute(fake_bpy.context)
+    return run
+
+
+def run_projection(module, obj):
+    def run():
+        module.Stereographic(obj.data, obj.name, module.sphere_center, module.sphere_radius,
+                             module.wall_thickness, module.point_light)
+    return run
+
+
+def run_projection_thickness(module, obj):
+    """
+    :return: Function that reprojects obj with a new wall thickness against a warm cache, so only the inner
+             surface and the orientation are recomputed
+    """
+    cache = module.ProjectionCache()
+    thickness = iter(np.linspace(1.0, 5.0, 10000).tolist())
+    module.Stereographic(obj.data, obj.name, module.sphere_center, module.sphere_radius, module.wall_thickness,
+                         module.point_light, cache=cache)
+
+    def run():
+        module.Stereographic(obj.data, obj.name, module.sphere_center, module.sphere_radius, next(thickness),
+                             module.point_light, cache=cache)
+    return run
+
+
+def run_live_update(module, obj, moved=0.01):
+    """
+    :return: Function that slides a fraction of obj's vertices within their plane and brings its live
+             projection up to date, as the depsgraph handler does after an edit
+    """
+    output = fake_bpy.Object(obj.name + "_stereographic", fake_bpy.Mesh(obj.name + "_stereographic"))
+    live = module.LiveProjection(obj, output, 100.0, 2.5, (0.0, 0.0, 23.7))
+    coords = obj.data.vertices.attributes["co"]
+    rng = np.random.default_rng(0)
+
+    def run():
+        picked = rng.choice(len(coords), max(int(len(coords) * moved), 1), replace=False)
+        coords[picked, :2] += rng.uniform(-0.01, 0.01, (len(picked), 2)).astype(np.float32)
+        live.update(obj, output)
+    return run
+
+
+def run_preview(module, obj):
+    """
+    :return: Function that re-runs Stereographic Preview with a new wall thickness, as the redo panel does
+             while the parameters are tuned on the decimated copy
+    """
+    fake_bpy.context.active_object = obj
+    thickness = iter(np.linspace(1.0, 5.0, 10000).tolist())
+    module.GTstereographicPreview().execute(fake_bpy.context)
+
+    def run():
+        op = module.GTstereographicPreview()
+        op.wall_thickness = next(thickness)
+        op.execute(fake_bpy.context)
+    return run
+
+
+def benchmarks(modules, mode):
+    """
+    :param mode: Mode the GT operators run in; the projection benchmarks always run in object mode and are
+                 only listed for 'OBJECT'
+    :return: List of (benchmark name, generator name, setup) where setup(obj) returns the timed function
+    """
+    straighten = modules["GT_straighten_1_1"]
+    curve = modules["GT_curve_1_1"]
+    fair = modules["GT_fair_1_0"]
+    projection = modules["projection"]
+    operators = [
+        ("straighten", "polyline", lambda obj: run_operator(straighten, straighten.GTstraighten, obj, mode)),
+        ("straighten", "zigzag", lambda obj: run_operator(straighten, straighten.GTstraighten, obj, mode)),
+        ("curvify", "polyline", lambda obj: run_operator(curve, curve.GTcurvify, obj, mode)),
+        ("curvify", "zigzag", lambda obj: run_operator(curve, curve.GTcurvify, obj, mode)),
+        ("straighten", "strands", lambda obj: run_operator(straighten, straighten.GTstraighten, obj, mode)),
+        ("curvify", "strands", lambda obj: run_operator(curve, curve.GTcurvify, obj, mode)),
+        ("straighten", "plane_row", lambda obj: run_operator(straighten, straighten.GTstraighten, obj, mode)),
+        ("curvify_redo", "polyline", lambda obj: run_redo(curve, curve.GTcurvify, obj, mode)),
+        ("curvify_fit", "zigzag",
+         lambda obj: run_operator(curve, curve.GTcurvify, obj, mode, shape='FIT', degree=5)),
+        ("curvify_fit", "strands",
+         lambda obj: run_operator(curve, curve.GTcurvify, obj, mode, shape='FIT', degree=5)),
+        ("fair", "zigzag", lambda obj: run_operator(fair, fair.GTfair, obj, mode)),
+        ("fair", "strands", lambda obj: run_operator(fair, fair.GTfair, obj, mode)),
+        ("fair_redo", "zigzag", lambda obj: run_redo(fair, fair.GTfair, obj, mode, "strength", (1.0, 100.0))),
+    ]
+    if mode != 'OBJECT':
+        return operators
+    return operators + [
+        ("projection", "plane", lambda obj: run_projection(projection, obj)),
+        ("projection_thickness", "plane", lambda obj: run_projection_thickness(projection, obj)),
+        ("projection_live", "plane", lambda obj: run_live_update(modules["GT_stereographic_live_1_0"], obj)),
+        ("projection_preview", "plane", lambda obj: run_preview(modules["GT_stereographic_live_1_0"], obj)),
+    ]
+
+
+def time_call(func, min_time=0.5, max_repeats=25):
+    """
+    :return: Best wall time over up to max_repeats calls after a warm-up call, stopping once min_time has
+             been spent
+    """
+    func()
+    best = float("inf")
+    spent = 0.0
+    for _ in range(max_repeats):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        spent += elapsed
+        if spent >= min_time:
+            break
+    return best
+
+
+def compare(results, baseline, tolerance, min_seconds):
+    """
+    :return: List of (result, baseline seconds) for every result slower than its baseline by more than the
+             tolerance (relative) and min_seconds (absolute)
+    """
+    stored = {(r["benchmark"], r["generator"], r["size"], r["mode"]): r["seconds"] for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        before = stored.get((r["benchmark"], r["generator"], r["size"], r["mode"]))
+        if before is not None and r["seconds"] > before * (1 + tolerance) and r["seconds"] - before > min_seconds:
+            regressions.append((r, before))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="vertex counts to time")
+    parser.add_argument("--only", nargs="+", help="benchmark names to run (default: all)")
+    parser.add_argument("--mode", choices=("OBJECT", "EDIT"), nargs="+", default=['OBJECT', 'EDIT'],
+                        help="modes the operators run in (default: both); EDIT times the edit-mesh path")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative slowdown (default 0.5)")
+    parser.add_argument("--min-seconds", type=float, default=0.002,
+                        help="ignore slowdowns smaller than this many seconds (default 0.002)")
+    args = parser.parse_args(argv)
+
+    modules = load_scripts()
+    results = []
+    for mode in args.mode:
+        for name, generator, setup in benchmarks(modules, mode):
+            if args.only and name not in args.only:
+                continue
+            for size in args.sizes:
+                obj = GENERATORS[generator](size)
+                seconds = time_call(setup(obj))
+                results.append({"benchmark": name, "generator": generator, "size": size, "mode": mode,
+                                "vertices": len(obj.data.vertices), "seconds": seconds})
+                print(f"{name:<20} {generator:<9} {mode:<6} {size:>10}  {seconds * 1000:12.3f} ms", flush=True)
+
+    report = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_seconds)
+        for r, before in regressions:
+            print(f"REGRESSION {r['benchmark']} {r['generator']} {r['size']}: "
+                  f"{before * 1000:.3f} ms -> {r['seconds'] * 1000:.3f} ms")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+from collections import namedtuple
+
+import bpy
+import numpy as np
+
+import gt_profile
+from gt_chain import ChainCache, walk_chains
+from gt_fairing import fair
+from gt_mesh_io import mesh_access, mesh_objects
+
+
+bl_info = {
+    "name": "Fair",
+    "author": "George Gardner",
+    "version": (1, 0),
+    "blender": (3, 0, 0),
+    "category": "Mesh",
+}
+
+# every selected chain of one object, concatenated in path order, with the vertices that stay in place
+Lines = namedtuple("Lines", ["verts", "coords", "pinned"])
+
+# walked lines kept between redo-panel re-executions
+line_cache = ChainCache()
+
+
+class GTfair(bpy.types.Operator):
+    """ Smooth every selected run of vertices or edges, keeping its ends (and pinned vertices) in place """
+    bl_idname = "mesh.fair_line"
+    bl_label = "Fair"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    strength: bpy.props.FloatProperty(
+        name="Strength",
+        description="Smoothing length in vertices",
+        default=10.0,
+        min=0.0,
+        soft_max=1000.0,
+    )
+
+    order: bpy.props.EnumProperty(
+        name="Order",
+        description="What the fairing smooths out",
+        items=[
+            ('LAPLACIAN', "Laplacian", "Pull every vertex toward its neighbors; flattens bends"),
+            ('BILAPLACIAN', "Bi-Laplacian", "Even out the curvature; keeps the overall bend"),
+        ],
+        default='BILAPLACIAN',
+    )
+
+    pin_group: bpy.props.StringProperty(
+        name="Pin Group",
+        description="Vertex group whose vertices stay in place, besides the chain ends",
+        default="",
+    )
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "strength")
+        layout.prop(self, "order")
+        obj = context.active_object
+        if obj is not None:
+            layout.prop_search(self, "pin_group", obj, "vertex_groups")
+
+    def invoke(self, context, event):
+        # pin weights can change without moving a vertex; only the redo panel's re-executions reuse lines
+        line_cache.entries.clear()
+        return self.execute(context)
+
+    def execute(self, context):
+        profile = gt_profile.start(self.bl_label)
+
+        faired = 0
+        for obj in mesh_objects(context):
+            # collect selected edges; on redo the walked lines are reused if the mesh is unchanged
+            with profile.phase("selection") as phase:
+                mesh = mesh_access(obj)
+                selected_edges = mesh.selected_edges()
+                phase.count(edges=len(selected_edges))
+            with profile.phase("walk") as phase:
+                cache_key = (ChainCache.key(obj, selected_edges), self.pin_group)
+                lines = line_cache.get(cache_key, mesh.coords)
+                if lines is None:
+                    lines = line_cache.put(cache_key, self.prepare_lines(mesh, selected_edges, self.pin_group))
+                phase.count(vertices=len(lines.verts))
+            if not len(lines.verts):
+                continue
+
+            # all lines are solved as one banded system; the pins keep them from affecting each other
+            with profile.phase("fair"):
+                new_coords = fair(lines.coords, lines.pinned, self.strength, self.order)
+            with profile.phase("write"):
+                mesh.write_coords(lines.verts, new_coords)
+            faired += 1
+
+        summary = profile.finish()
+        if summary:
+            self.report({'INFO'}, summary)
+
+        if not faired:
+            self.report({'WARNING'}, "Select a run of connected edges")
+            return {'CANCELLED'}
+
+        return {'FINISHED'}
+
+    @staticmethod
+    def prepare_lines(mesh, selected_edges, pin_group):
+        walked = walk_chains(selected_edges)
+        if not walked:
+            return Lines(np.zeros(0, dtype=np.intp), np.zeros((0, 3)), np.zeros(0, dtype=bool))
+        verts = np.concatenate([v for v, _ in walked])
+        tagged = mesh.group_weights(pin_group, verts) > 0 if pin_group else np.zeros(len(verts), dtype=bool)
+
+        # open chains are pinned at both ends; a loop is opened at a pinned vertex (its first one if it has
+        # none) and closed again by repeating that vertex at the end, so both copies stay where they are
+        paths = []
+        pinned = []
+        start = 0
+        for chain_verts, closed in walked:
+            chain_pinned = tagged[start:start + len(chain_verts)]
+            start += len(chain_verts)
+            if closed:
+                first = int(np.argmax(chain_pinned))
+                chain_verts = np.roll(chain_verts, -first)
+                chain_pinned = np.roll(chain_pinned, -first)
+                chain_verts = np.append(chain_verts, chain_verts[0])
+                chain_pinned = np.append(chain_pinned, True)
+            chain_pinned = chain_pinned.copy()
+            chain_pinned[[0, -1]] = True
+            paths.append(chain_verts)
+            pinned.append(chain_pinned)
+
+        verts = np.concatenate(paths)
+        return Lines(verts, mesh.coords(verts), np.concatenate(pinned))
+
+
+def menu_func(self, context):
+    self.layout.operator(GTfair.bl_idname)
+
+
+def register():
+    bpy.utils.register_class(GTfair)
+    bpy.types.VIEW3D_MT_edit_mesh_vertices.append(menu_func)
+
+
+def unregister():
+    bpy.utils.unregister_class(GTfair)
+    bpy.types.VIEW3D_MT_edit_mesh_vertices.remove(menu_func)
+
+
+if __name__ == "__main":
+    register()
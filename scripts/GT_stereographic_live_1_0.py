@@ -0,0 +1,376 @@
+import time
+
+import bpy
+import numpy as np
+
+import gt_profile
+from gt_mesh_io import build_mesh, read_edge_vertices, read_polygon_loops, read_vertex_coords
+from projection_cache import ProjectionCache
+from projection_core import cluster_proxy, reproject_changed, stereographic_shell
+
+
+bl_info = {
+    "name": "Stereographic Live",
+    "author": "George Gardner",
+    "version": (1, 0),
+    "blender": (3, 0, 0),
+    "category": "Object",
+}
+
+# seconds without further edits before the output is updated; keeps dragging smooth
+DEBOUNCE = 1 / 30
+
+# source object name -> LiveProjection, for every object projected live in this session
+live_projections = {}
+
+# largest proxy projected by a preview, whatever the ratio; keeps a redo well under 100 ms on any source
+PREVIEW_MAX_VERTS = 40000
+
+# source object name -> (asked ratio, proxy) of the last preview; the depsgraph handler drops the entry on any
+# geometry update of the source, so tuning the parameters in the redo panel only projects the proxy
+preview_proxies = {}
+
+# shell components of the proxies; tuning one parameter reuses the topology and the untouched surface
+preview_cache = ProjectionCache(max_bytes=1 << 28)
+
+
+def sync_source(source):
+    """
+    :return: Mesh data of a mesh object, brought up to date with the edit mesh in edit mode
+    """
+    # the mesh data lags behind the edit mesh until it is synced
+    if source.mode == 'EDIT':
+        source.update_from_editmode()
+    return source.data
+
+
+def read_source(source):
+    """
+    :return: Tuple (coords, (loop_starts, loop_totals, loop_verts), edges) of a mesh object, edit mode included
+    """
+    mesh = sync_source(source)
+    return read_vertex_coords(mesh), read_polygon_loops(mesh), read_edge_vertices(mesh)
+
+
+def output_object(context, source):
+    """
+    :return: The object the projection of source is written to, created in the active collection if needed
+    """
+    live = live_projections.get(source.name)
+    name = live.output_name if live is not None else source.name + "_stereographic"
+    output = bpy.data.objects.get(name)
+    if output is None:
+        output = bpy.data.objects.new(name, bpy.data.meshes.new(name))
+        context.collection.objects.link(output)
+    return output
+
+
+def write_shell(output, shell):
+    mesh = output.data
+    mesh.clear_geometry()
+    build_mesh(mesh, shell.coords, shell.edges, shell.loop_starts, shell.loop_totals, shell.loop_verts)
+
+
+def preview_proxy(source, ratio):
+    """
+    Decimates the source, reusing the last proxy until the source geometry is updated. Only a new proxy
+    syncs and reads the source, so a redo costs the same whatever its size.
+
+    :return: Tuple (coords, loop_starts, loop_totals, loop_verts) of the decimated source, cached per source
+    """
+    cached = preview_proxies.get(source.name)
+    if cached is not None and cached[0] == ratio:
+        return cached[1]
+    mesh = sync_source(source)
+    # the preview drops the loose edges, so they are not read
+    proxy = cluster_proxy(read_vertex_coords(mesh), *read_polygon_loops(mesh),
+                          min(ratio, PREVIEW_MAX_VERTS / max(len(mesh.vertices), 1)))
+    preview_proxies[source.name] = (ratio, proxy)
+    watch_depsgraph()
+    return proxy
+
+
+class LiveProjection:
+    """
+    A source mesh kept projected into a linked output object.
+
+    The output is rebuilt when the source topology changes. Otherwise only the vertices that moved since the
+    last snapshot are reprojected and written back with one foreach_set.
+    """
+    def __init__(self, source, output, sphere_diameter, wall_thickness, point_light):
+        self.source_name = source.name
+        self.output_name = output.name
+        self.radius = sphere_diameter / 2
+        self.center = np.array((0, 0, self.radius), dtype=np.float64)
+        self.thickness = wall_thickness
+        self.point_light = np.array(point_light, dtype=np.float64)
+        self.last_change = 0.0
+        self.error = None
+        self.rebuild(source, output)
+
+    def rebuild(self, source, output):
+        with gt_profile.phase("read") as phase:
+            coords, loops, edges = read_source(source)
+            phase.count(vertices=len(coords), polygons=len(loops[0]))
+        with gt_profile.phase("shell"):
+            shell = stereographic_shell(coords, *loops, self.center, self.radius, self.thickness,
+                                        self.point_light, edges=edges)
+        with gt_profile.phase("build", vertices=len(shell.coords), polygons=len(shell.loop_starts)):
+            write_shell(output, shell)
+
+        self.snapshot = coords
+        self.loops = loops
+        self.edges = edges
+        self.shell_coords = np.asarray(shell.coords, dtype=np.float32)
+
+    def topology_changed(self, loops, edges):
+        return not (all(np.array_equal(a, b) for a, b in zip(loops, self.loops))
+                    and np.array_equal(edges, self.edges))
+
+    def update(self, source, output):
+        """
+        Brings the output up to date with the source: in place if only vertices moved, otherwise rebuilt.
+
+        :raises ValueError: If a vertex misses the sphere; the output keeps its last valid state
+        """
+        with gt_profile.phase("read") as phase:
+            coords, loops, edges = read_source(source)
+            phase.count(vertices=len(coords), polygons=len(loops[0]))
+        # the output is rebuilt as well if it was edited itself
+        if (len(coords) != len(self.snapshot) or self.topology_changed(loops, edges)
+                or len(output.data.vertices) != len(self.shell_coords)):
+            self.rebuild(source, output)
+            return
+
+        with gt_profile.phase("reproject") as phase:
+            changed = reproject_changed(self.snapshot, coords, self.shell_coords, self.center, self.radius,
+                                        self.thickness, self.point_light)
+            phase.count(vertices=len(changed))
+        if len(changed):
+            with gt_profile.phase("write"):
+                output.data.vertices.foreach_set("co", self.shell_coords.reshape(-1))
+                output.data.update()
+
+
+def flush_live_projections():
+    """
+    Timer callback: updates every live projection whose source has been idle for DEBOUNCE seconds.
+
+    :return: Seconds until the next check, or None once nothing is pending
+    """
+    now = time.perf_counter()
+    wait = None
+    for name, live in list(live_projections.items()):
+        if not live.last_change:
+            continue
+        idle = now - live.last_change
+        if idle < DEBOUNCE:
+            wait = DEBOUNCE - idle if wait is None else min(wait, DEBOUNCE - idle)
+            continue
+
+        live.last_change = 0.0
+        source = bpy.data.objects.get(live.source_name)
+        output = bpy.data.objects.get(live.output_name)
+        if source is None or output is None:
+            del live_projections[name]
+            continue
+        # there is no operator to report to, so a profiled update is printed
+        profile = gt_profile.start(f"Stereographic Live {live.source_name}")
+        try:
+            live.update(source, output)
+            live.error = None
+        except ValueError as e:
+            if str(e) != live.error:
+                print(f"{live.source_name}: {e}")
+            live.error = str(e)
+        summary = profile.finish()
+        if summary:
+            print(summary)
+    return wait
+
+
+@bpy.app.handlers.persistent
+def on_depsgraph_update(scene, depsgraph):
+    # only note the change here; the work happens in the timer once the edits pause
+    if not live_projections and not preview_proxies:
+        return
+    now = time.perf_counter()
+    pending = False
+    for update in depsgraph.updates:
+        if not update.is_updated_geometry:
+            continue
+        name = getattr(update.id.original, "name", None)
+        # any edit of a previewed source makes the next preview decimate it again
+        preview_proxies.pop(name, None)
+        live = live_projections.get(name)
+        if live is not None:
+            live.last_change = now
+            pending = True
+    if pending and not bpy.app.timers.is_registered(flush_live_projections):
+        bpy.app.timers.register(flush_live_projections, first_interval=DEBOUNCE)
+
+
+def watch_depsgraph():
+    """ Installs the depsgraph handler that follows the edits of live and previewed sources """
+    if on_depsgraph_update not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+
+
+def forget_projections():
+    """ Drops every live projection and preview of this session; their outputs are kept as they are """
+    if bpy.app.timers.is_registered(flush_live_projections):
+        bpy.app.timers.unregister(flush_live_projections)
+    live_projections.clear()
+    preview_proxies.clear()
+    preview_cache.clear()
+
+
+@bpy.app.handlers.persistent
+def on_load_pre(*args):
+    # projections are keyed by object name; objects of the same name in the next file must not be picked up
+    forget_projections()
+
+
+class GTstereographicLive(bpy.types.Operator):
+    """ Project the active mesh through a sphere into a linked object that follows every edit """
+    bl_idname = "object.stereographic_live"
+    bl_label = "Stereographic Live"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    sphere_diameter: bpy.props.FloatProperty(name="Sphere Diameter", default=100.0, min=0.001)
+    wall_thickness: bpy.props.FloatProperty(name="Wall Thickness", default=2.5, min=0.0)
+    point_light: bpy.props.FloatVectorProperty(name="Point Light", default=(0.0, 0.0, 23.7), subtype='XYZ')
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type == 'MESH'
+
+    def execute(self, context):
+        source = context.active_object
+        if not 0 < self.wall_thickness < self.sphere_diameter / 2:
+            self.report({'ERROR'}, "Wall thickness must be greater than 0 and smaller than the sphere radius")
+            return {'CANCELLED'}
+
+        # reuse the linked output when the projection is started again, e.g. with new settings
+        output = output_object(context, source)
+        profile = gt_profile.start(self.bl_label)
+        try:
+            live_projections[source.name] = LiveProjection(source, output, self.sphere_diameter,
+                                                           self.wall_thickness, self.point_light)
+        except ValueError as e:
+            profile.finish()
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        summary = profile.finish()
+        if summary:
+            self.report({'INFO'}, summary)
+
+        watch_depsgraph()
+        return {'FINISHED'}
+
+
+class GTstereographicLiveStop(bpy.types.Operator):
+    """ Stop updating the stereographic projection of the active mesh; the output object is kept """
+    bl_idname = "object.stereographic_live_stop"
+    bl_label = "Stop Stereographic Live"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.name in live_projections
+
+    def execute(self, context):
+        del live_projections[context.active_object.name]
+        return {'FINISHED'}
+
+
+class GTstereographicPreview(bpy.types.Operator):
+    """ Tune the stereographic projection of the active mesh on a decimated copy, then build it in full """
+    bl_idname = "object.stereographic_preview"
+    bl_label = "Stereographic Preview"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    sphere_diameter: bpy.props.FloatProperty(name="Sphere Diameter", default=100.0, min=0.001)
+    wall_thickness: bpy.props.FloatProperty(name="Wall Thickness", default=2.5, min=0.0)
+    point_light: bpy.props.FloatVectorProperty(name="Point Light", default=(0.0, 0.0, 23.7), subtype='XYZ')
+    preview: bpy.props.BoolProperty(name="Preview", default=True,
+                                    description="Project a decimated copy; uncheck to build the full shell")
+    preview_ratio: bpy.props.EnumProperty(name="Preview Vertices", default='16',
+                                          items=[('16', "1/16", "Keep about one vertex in 16"),
+                                                 ('64', "1/64", "Keep about one vertex in 64")])
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type == 'MESH'
+
+    def execute(self, context):
+        source = context.active_object
+        radius = self.sphere_diameter / 2
+        if not 0 < self.wall_thickness < radius:
+            self.report({'ERROR'}, "Wall thickness must be greater than 0 and smaller than the sphere radius")
+            return {'CANCELLED'}
+
+        profile = gt_profile.start(self.bl_label)
+        # the preview drops the loose edges, the full shell keeps them
+        if self.preview:
+            with profile.phase("proxy") as phase:
+                coords, *loops = preview_proxy(source, 1 / int(self.preview_ratio))
+                phase.count(vertices=len(coords), polygons=len(loops[0]))
+            edges = None
+        else:
+            preview_proxies.pop(source.name, None)
+            with profile.phase("read") as phase:
+                coords, loops, edges = read_source(source)
+                phase.count(vertices=len(coords), polygons=len(loops[0]))
+
+        # both go through the same projection; only the vertex count differs
+        build_shell = preview_cache.shell if self.preview else stereographic_shell
+        try:
+            with profile.phase("shell"):
+                shell = build_shell(coords, *loops, (0, 0, radius), radius, self.wall_thickness,
+                                    self.point_light, edges=edges)
+        except ValueError as e:
+            profile.finish()
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        with profile.phase("build", vertices=len(shell.coords), polygons=len(shell.loop_starts)):
+            write_shell(output_object(context, source), shell)
+
+        summary = profile.finish()
+        if summary:
+            self.report({'INFO'}, summary)
+        return {'FINISHED'}
+
+
+classes = (GTstereographicLive, GTstereographicLiveStop, GTstereographicPreview)
+
+
+def menu_func(self, context):
+    self.layout.operator(GTstereographicLive.bl_idname)
+    self.layout.operator(GTstereographicLiveStop.bl_idname)
+    self.layout.operator(GTstereographicPreview.bl_idname)
+
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+    bpy.types.VIEW3D_MT_object.append(menu_func)
+    bpy.app.handlers.load_pre.append(on_load_pre)
+
+
+def unregister():
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
+    bpy.types.VIEW3D_MT_object.remove(menu_func)
+    if on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+    if on_load_pre in bpy.app.handlers.load_pre:
+        bpy.app.handlers.load_pre.remove(on_load_pre)
+    forget_projections()
+
+
+if __name__ == "__main__":
+    register()
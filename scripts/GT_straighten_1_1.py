@@ -1,6 +1,9 @@
 import bpy
 import numpy as np
-import math
+
+import gt_profile
+from gt_chain import ChainCache, ChainSet, map_chains, shutdown_pool, walk_chains
+from gt_mesh_io import mesh_access, mesh_objects
 
 
 bl_info = {
@@ -11,119 +14,72 @@ bl_info = {
     "category": "Mesh",
 }
 
+# walked lines kept between redo-panel re-executions
+line_cache = ChainCache()
+
 
 class GTstraighten(bpy.types.Operator):
-    """ Make a straight line from selected vertices or edges """
+    """ Make a straight line from every selected run of vertices or edges """
     bl_idname = "mesh.straight_line"
     bl_label = "Straighten"
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        # record mode
-        previousMode = bpy.context.active_object.mode
-
-        # switch to Object mode so the selection gets updated
-        bpy.ops.object.mode_set(mode='OBJECT')
-
-        # collect selected vertices and edges
-        selectedVerts = [v for v in bpy.context.active_object.data.vertices if v.select]
-        selectedEdges = [e for e in bpy.context.active_object.data.edges if e.select]
-
-        self.vertEndpoints = []
-        self.sVerts = selectedVerts
-        self.sEdges = selectedEdges
-        self.excludedEdgeIndex = []
-
-        # find the vertices that are endpoints
-        for i, v in enumerate(self.sVerts):
-            vertEdgeCount = 0
-            for e in self.sEdges:
-                if v.index == e.vertices[0] or v.index == e.vertices[1]:
-                    vertEdgeCount += 1
-            if vertEdgeCount == 1:
-                self.vertEndpoints.append(i)
-            # vertEdgeCount 1 is endpoint, 2 is line, 3 is error
-        # if len(vertEndpoints) > 2 then you have a problem
-
-        # create ordered list and starting vert
-        self.vertLine = []
-        self.vertLine.append(self.Vert(self.vertEndpoints[0], self.sVerts[self.vertEndpoints[0]].index,
-                                       self.sVerts[self.vertEndpoints[0]].co, endpoint=True))
-
-        # follow the path, recording the verts along the way
-        self.follow_path(self.vertEndpoints[0])
-
-        # calulate total length
-        totalLength = 0.000
-        prevCoords = (0, 0, 0)
-        for iv, v in enumerate(self.vertLine):
-            if iv == 0:
-                prevCoords = v.coords
+        profile = gt_profile.start(self.bl_label)
+
+        # every mesh in edit mode (or the active mesh outside edit mode), each worked on without switching modes
+        straightened = 0
+        for obj in mesh_objects(context):
+            # collect selected edges; on redo the walked lines are reused if the mesh is unchanged
+            with profile.phase("selection") as phase:
+                mesh = mesh_access(obj)
+                selectedEdges = mesh.selected_edges()
+                phase.count(edges=len(selectedEdges))
+            with profile.phase("walk") as phase:
+                cacheKey = ChainCache.key(obj, selectedEdges)
+                lines = line_cache.get(cacheKey, mesh.coords)
+                if lines is None:
+                    lines = line_cache.put(cacheKey, self.prepare_lines(mesh.coords, selectedEdges))
+                phase.count(chains=len(lines.chains), vertices=len(lines.verts))
+            if not lines.chains:
                 continue
-            else:
-                v.lengthFromPrevious = v.magnitude_to(prevCoords)
-                totalLength += v.lengthFromPrevious
-            prevCoords = v.coords
 
-            # assign earch vertex a percentage of total length
-        for iv, v in enumerate(self.vertLine):
-            if v.lengthFromPrevious > 0:
-                v.totalPercentFromPrevious = v.lengthFromPrevious / totalLength
+            # straighten every line on the thread pool, then write them all back at once
+            with profile.phase("straighten"):
+                newCoords = np.concatenate(map_chains(self.straighten, lines.chains))
+            with profile.phase("write"):
+                mesh.write_coords(lines.verts, newCoords)
+            straightened += len(lines.chains)
 
-        # get vector between two endpoints, then magnitude, then unit vector?
-        displacementVector = self.vertLine[-1].coords - self.vertLine[0].coords
-        # totalLength = math.sqrt(np.sum(displacementVector ** 2))
+        summary = profile.finish()
+        if summary:
+            self.report({'INFO'}, summary)
 
-        # from start, each subsequent vert should have percentage of total magnitude in same vector direction - first
-        # and last vector untouched
-        runningCoords = self.vertLine[0].coords
-        for iv, v in enumerate(self.vertLine):
-            if v.endpoint:
-                continue
-            else:
-                v.coords = runningCoords + (displacementVector * v.totalPercentFromPrevious)
-                runningCoords = v.coords
+        if not straightened:
+            self.report({'WARNING'}, "Select a run of connected edges with two ends")
+            return {'CANCELLED'}
 
-        # assign locations to actual verts
-        for v in self.vertLine:
-            self.sVerts[v.localIndex].co = v.coords
+        return {'FINISHED'}
 
-            # switch back to the mode we were in
-        bpy.ops.object.mode_set(mode=previousMode)
+    @staticmethod
+    def prepare_lines(read_coords, selectedEdges):
+        # walk the selected edges into ordered chains; each open one is a line from one endpoint to the other.
+        # a loop through a junction (e.g. crossing edge loops) starts and ends on the same vertex, so it has no
+        # line to straighten onto and is skipped like any other loop
+        openChains = [(verts, closed) for verts, closed in walk_chains(selectedEdges)
+                      if not closed and verts[0] != verts[-1]]
+        return ChainSet.read(openChains, read_coords)
 
-        return {'FINISHED'}
+    @staticmethod
+    def straighten(line):
+        # get vector between two endpoints
+        displacementVector = line.coords[-1] - line.coords[0]
 
-    class Vert:
-        def __init__(self, local_index, global_index, coords, endpoint=False):
-            self.localIndex = local_index
-            self.globalIndex = global_index
-            self.coords = np.array(coords, dtype=np.float64)
-            self.endpoint = endpoint
-            self.lengthFromPrevious = 0.000
-            self.totalPercentFromPrevious = 0.000
-
-        def displacement_vector_to(self, to_coords):  # displacement Vector of this vert to specified coords
-            return to_coords - self.coords
-
-        def magnitude_to(self, to_coords):  # length from this vert to specified coords
-            return math.sqrt(np.sum(self.displacement_vector_to(to_coords) ** 2))
-
-    def follow_path(self, v_index):
-        for e in self.sEdges:
-            if e.vertices[0] == self.sVerts[v_index].index or e.vertices[1] == self.sVerts[v_index].index:
-                if e.index not in self.excludedEdgeIndex:
-                    self.excludedEdgeIndex.append(e.index)
-                    ep = True if len(self.excludedEdgeIndex) == len(self.sEdges) else False
-
-                    otherVindex = 1 if e.vertices[0] == self.sVerts[v_index].index else 0
-                    for iv, v in enumerate(self.sVerts):
-                        # print(f'vert index = {v.index}')
-                        if v.index == e.vertices[otherVindex]:
-                            self.vertLine.append(self.Vert(iv, v.index, v.co, ep))
-                            # if not an endpoint, loop
-                            if iv not in self.vertEndpoints:
-                                # print('moving')
-                                self.follow_path(iv)
+        # from start, each subsequent vert should have percentage of total magnitude in same vector direction - first
+        # and last vector untouched
+        newCoords = line.coords[0] + np.outer(line.fractions, displacementVector)
+        newCoords[line.endpoints] = line.coords[line.endpoints]
+        return newCoords
 
 
 def menu_func(self, context):
@@ -138,6 +94,7 @@ def register():
 def unregister():
     bpy.utils.unregister_class(GTstraighten)
     bpy.types.VIEW3D_MT_edit_mesh_vertices.remove(menu_func)
+    shutdown_pool()
 
 
 if __name__ == "__main":
@@ -0,0 +1,200 @@
+"""
+Bezier curve evaluation in the Bernstein basis.
+
+A curve of degree d sampled at n parameters is the (n, d + 1) Bernstein basis matrix times the (d + 1, 3)
+control points, so any number of samples costs one matrix product. Basis matrices for uniform sampling
+are kept in a small LRU cache, so repeated calls (e.g. dragging a redo-panel slider) reuse them.
+
+Points are placed at exact arc-length fractions with a cumulative chord-length table over a sampling that
+is only as fine as the curve's flatness requires, plus a binary search per point.
+
+fit finds the curve of a given degree closest (in the least-squares sense) to a sequence of points at given
+parameters, with its ends on the first and last point. The fit is linear in the points, so the solve for a
+set of parameters is kept as a small matrix and refitting (e.g. at another redo-panel setting) is one matrix
+product.
+"""
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from math import ceil, comb, sqrt
+
+import numpy as np
+
+from gt_chain import buffer_digest
+
+
+def bernstein_basis(degree, t_values):
+    """
+    Evaluates the Bernstein basis polynomials of the given degree.
+
+    :param degree: Degree of the curve (number of control points - 1)
+    :param t_values: Parameters in [0, 1]
+    :return: (len(t_values), degree + 1) array; row i holds the weight of every control point at t_values[i]
+    """
+    t = np.asarray(t_values, dtype=np.float64).reshape(-1, 1)
+    k = np.arange(degree + 1)
+    coefficients = np.array([comb(degree, i) for i in k], dtype=np.float64)
+    return coefficients * t ** k * (1 - t) ** (degree - k)
+
+
+@lru_cache(maxsize=32)
+def basis_matrix(degree, samples):
+    """
+    Cached Bernstein basis for `samples` parameters evenly spaced from 0 to 1 inclusive.
+
+    :param degree: Degree of the curve
+    :param samples: Number of parameters
+    :return: Read-only (samples, degree + 1) array
+    """
+    matrix = bernstein_basis(degree, np.linspace(0, 1, samples))
+    matrix.flags.writeable = False
+    return matrix
+
+
+# fit matrices by (degree, number of points, parameter digest), least recently used first
+_fit_matrices = OrderedDict()
+_fit_lock = threading.Lock()
+
+# total size of the cached fit matrices; each takes 8 (degree + 1) bytes per point
+FIT_CACHE_BYTES = 1 << 28
+
+
+def fit_matrix(degree, t_values):
+    """
+    Least-squares solve for the inner control points of a curve whose ends are fixed, cached by the degree,
+    the number of parameters and a digest of their values.
+
+    With B the Bernstein basis at t_values and its first and last columns b0 and bd, the inner control points
+    closest to points X are S (X - b0 X[0] - bd X[-1]), with S the pseudo-inverse of B's inner columns. S b0
+    and S bd are kept with S, so a fit costs one (degree - 1, n) by (n, dim) product.
+
+    :param degree: Degree of the curve, at least 2 and less than len(t_values)
+    :param t_values: Parameters of the points in [0, 1], 0 for the first and 1 for the last
+    :return: Read-only (degree - 1, n + 2) array [S | S b0 | S bd]
+    """
+    t_values = np.asarray(t_values, dtype=np.float64)
+    key = (degree, len(t_values), buffer_digest(t_values))
+    with _fit_lock:
+        matrix = _fit_matrices.get(key)
+        if matrix is not None:
+            _fit_matrices.move_to_end(key)
+            return matrix
+
+    # The pseudo-inverse from the normal equations: the inner columns are well conditioned at the degrees a
+    # polyline is fitted with (condition number below 1e3 up to degree 10) and the small Gram matrix is far
+    # cheaper than an SVD of the tall basis. Repeated parameters (coincident points) can leave too few
+    # distinct ones for the degree; the SVD then gives the minimum-norm solution
+    basis = bernstein_basis(degree, t_values)
+    inner = basis[:, 1:-1]
+    try:
+        solve = np.linalg.solve(inner.T @ inner, inner.T)
+    except np.linalg.LinAlgError:
+        solve = np.linalg.pinv(inner)
+    matrix = np.concatenate((solve, solve @ basis[:, [0, -1]]), axis=1)
+    matrix.flags.writeable = False
+
+    with _fit_lock:
+        _fit_matrices[key] = matrix
+        size = sum(m.nbytes for m in _fit_matrices.values())
+        while size > FIT_CACHE_BYTES and len(_fit_matrices) > 1:
+            size -= _fit_matrices.popitem(last=False)[1].nbytes
+    return matrix
+
+
+def fit(points, t_values, degree):
+    """
+    Fits a Bezier curve through the first and last point that passes as close as possible to the others.
+
+    :param points: (n, dim) array of points in order, n >= 2
+    :param t_values: Parameters of the points in [0, 1], 0 for the first and 1 for the last (e.g. their
+                     chord-length fractions)
+    :param degree: Degree of the curve; lowered to n - 1 for fewer points, which interpolates them
+    :return: (degree + 1, dim) float64 array of control points
+    """
+    points = np.asarray(points, dtype=np.float64)
+    degree = min(degree, len(points) - 1)
+    control_points = np.empty((degree + 1, points.shape[1]))
+    control_points[0] = points[0]
+    control_points[-1] = points[-1]
+    if degree >= 2:
+        matrix = fit_matrix(degree, t_values)
+        n = len(points)
+        control_points[1:-1] = (matrix[:, :n] @ points - np.outer(matrix[:, n], points[0])
+                                - np.outer(matrix[:, n + 1], points[-1]))
+    return control_points
+
+
+def sample(control_points, samples):
+    """
+    Evaluates a Bezier curve at `samples` evenly spaced parameters from 0 to 1 inclusive.
+
+    :param control_points: (degree + 1, dim) array of control points
+    :param samples: Number of points to return
+    :return: (samples, dim) array of points on the curve
+    """
+    control_points = np.asarray(control_points, dtype=np.float64)
+    return basis_matrix(len(control_points) - 1, samples) @ control_points
+
+
+def flattening_samples(control_points, tolerance=1e-4):
+    """
+    Number of evenly spaced samples needed for the polyline through them to stay within tolerance of the curve.
+
+    Uses the bound |B''(t)| <= d (d - 1) max |P[i] - 2 P[i + 1] + P[i + 2]| on the second derivative and
+    the chord error bound |B''| h^2 / 8 of a segment spanning h in t.
+
+    :param control_points: (degree + 1, dim) array of control points
+    :param tolerance: Allowed distance from the curve, relative to the length of the control polygon
+    :return: Number of samples, at least 2. It is one more than a power of two, so curves of similar shape
+             (e.g. while a redo-panel slider is dragged) share a cached basis_matrix
+    """
+    control_points = np.asarray(control_points, dtype=np.float64)
+    if not np.isfinite(control_points).all():
+        raise ValueError("control points must be finite")
+    degree = len(control_points) - 1
+    if degree < 2:
+        return 2
+
+    polygon_length = np.linalg.norm(np.diff(control_points, axis=0), axis=1).sum()
+    second_differences = np.diff(control_points, n=2, axis=0)
+    bound = degree * (degree - 1) * np.linalg.norm(second_differences, axis=1).max()
+    if polygon_length == 0 or bound == 0:
+        return 2
+
+    segments = ceil(sqrt(bound / (8 * tolerance * polygon_length)))
+    return (1 << (segments - 1).bit_length()) + 1
+
+
+def arc_length_table(points):
+    """
+    Cumulative chord lengths along a polyline.
+
+    :param points: (n, dim) array of points in order
+    :return: (n,) array; entry i is the length of the polyline from points[0] to points[i]
+    """
+    points = np.asarray(points, dtype=np.float64)
+    table = np.zeros(len(points))
+    np.cumsum(np.linalg.norm(np.diff(points, axis=0), axis=1), out=table[1:])
+    return table
+
+
+def points_at_fractions(points, table, fractions, dtype=np.float64):
+    """
+    Finds the points at the given fractions of the total length of a polyline.
+
+    :param points: (n, dim) array of points in order
+    :param table: arc_length_table(points)
+    :param fractions: Fractions of the total length in [0, 1]
+    :param dtype: dtype of the returned points; the lengths are searched in float64 either way
+    :return: (len(fractions), dim) array of points on the polyline
+    """
+    points = np.asarray(points, dtype=dtype)
+    targets = np.clip(np.asarray(fractions, dtype=np.float64), 0, 1) * table[-1]
+
+    # Binary search for the segment holding each target length, then interpolate within it
+    segment = np.clip(np.searchsorted(table, targets, side='right') - 1, 0, len(points) - 2)
+    span = table[segment + 1] - table[segment]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weight = np.where(span > 0, (targets - table[segment]) / span, 0.0).astype(dtype, copy=False)
+
+    return points[segment] + weight[:, np.newaxis] * (points[segment + 1] - points[segment])
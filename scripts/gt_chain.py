@@ -0,0 +1,280 @@
+"""
+Edge chain topology shared by the GT operators.
+
+Selected edges are turned into ordered vertex chains with a CSR-style vertex -> edge adjacency index that
+is built once with NumPy, then walked iteratively so every edge is visited exactly once.
+
+Chain holds one walked chain as contiguous arrays (indices, coordinates, segment lengths, ...), so the
+operators work on whole chains with NumPy instead of one Python object per vertex.
+
+ChainCache keeps the walked chains between re-executions of an operator, so dragging a redo-panel slider
+only re-evaluates the shape instead of walking the selection again.
+
+map_chains runs per-chain NumPy work on a shared thread pool. NumPy releases the GIL inside its kernels, so
+long chains are processed in parallel while Python only dispatches them.
+"""
+import hashlib
+import os
+from collections import OrderedDict, namedtuple
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+
+
+Adjacency = namedtuple("Adjacency", ["offsets", "neighbors", "edge_ids"])
+Adjacency.__doc__ = """
+CSR adjacency index. The edges touching vertex v are edge_ids[offsets[v]:offsets[v + 1]] and lead to
+neighbors[offsets[v]:offsets[v + 1]].
+"""
+
+
+def build_adjacency(edges, vert_count):
+    """
+    Builds a CSR vertex -> edge adjacency index.
+
+    :param edges: (E, 2) array of vertex index pairs, indices in range(vert_count)
+    :param vert_count: Number of vertices
+    :return: Adjacency
+    """
+    edges = np.asarray(edges, dtype=np.intp).reshape(-1, 2)
+    edge_ids = np.arange(len(edges))
+
+    sources = np.concatenate((edges[:, 0], edges[:, 1]))
+    order = np.argsort(sources, kind='stable')
+
+    offsets = np.zeros(vert_count + 1, dtype=np.intp)
+    np.cumsum(np.bincount(sources, minlength=vert_count), out=offsets[1:])
+
+    neighbors = np.concatenate((edges[:, 1], edges[:, 0]))[order]
+    return Adjacency(offsets, neighbors, np.concatenate((edge_ids, edge_ids))[order])
+
+
+def walk_chains(edges):
+    """
+    Splits a set of edges into ordered vertex chains.
+
+    Chains run between vertices that do not have exactly two edges (ends and junctions). Whatever is left
+    afterwards forms closed loops. Every edge is visited once, so the walk is linear in the edge count.
+
+    :param edges: (E, 2) array of vertex index pairs, e.g. the selected edges of a mesh
+    :return: List of (verts, closed) tuples; verts is an array of vertex indices in path order. Open chains
+             start at the end vertex with the lowest index, closed loops do not repeat their first vertex. A loop
+             through a junction is returned as an open chain that starts and ends on the junction
+    """
+    edges = np.asarray(edges).reshape(-1, 2)
+    if not len(edges):
+        return []
+
+    # Work on compact local indices so the index only scales with the selection, not the whole mesh
+    verts, local = np.unique(edges, return_inverse=True)
+    local = local.reshape(-1, 2)
+    adjacency = build_adjacency(local, len(verts))
+
+    degree = np.diff(adjacency.offsets).tolist()
+    offsets = adjacency.offsets.tolist()
+    neighbors = adjacency.neighbors.tolist()
+    edge_ids = adjacency.edge_ids.tolist()
+    used = [False] * len(local)
+
+    def next_edge(v):
+        for k in range(offsets[v], offsets[v + 1]):
+            if not used[edge_ids[k]]:
+                return k
+        return None
+
+    def follow(path, k):
+        # Walk from path[-1] along edge slot k until reaching a vertex that is not a pass-through
+        while True:
+            edge = edge_ids[k]
+            used[edge] = True
+            v = neighbors[k]
+            if degree[v] != 2 or v == path[0]:
+                return v
+            path.append(v)
+            k = offsets[v] if edge_ids[offsets[v]] != edge else offsets[v] + 1
+            if used[edge_ids[k]]:
+                return None
+
+    chains = []
+
+    # Open chains, started from every end or junction vertex
+    for start in (v for v in range(len(verts)) if degree[v] != 2):
+        k = next_edge(start)
+        while k is not None:
+            path = [start]
+            end = follow(path, k)
+            if end is not None:
+                path.append(end)
+            chains.append((verts[path], False))
+            k = next_edge(start)
+
+    # Any edge left over belongs to a closed loop of two-edge vertices
+    for e in range(len(local)):
+        if not used[e]:
+            path = [int(local[e, 0])]
+            follow(path, offsets[path[0]] if edge_ids[offsets[path[0]]] == e else offsets[path[0]] + 1)
+            chains.append((verts[path], True))
+
+    return chains
+
+
+class Chain:
+    """
+    One ordered chain of vertices, stored as a structure of arrays.
+
+    :ivar verts: (N,) vertex indices in path order
+    :ivar coords: (N, 3) coordinates of those vertices; float32 stays float32, anything else becomes float64
+    :ivar closed: Whether the last vertex connects back to the first
+    :ivar endpoints: (N,) bool mask, True for the first and last vertex of an open chain
+    :ivar lengths: (N,) distance of every vertex from the previous one, 0 for the first
+    :ivar fractions: (N,) running share of the total length at every vertex, from 0 to 1 (all 0 when the
+                     chain has no length). The closing segment of a loop is not counted. The running sum
+                     is accumulated in float64 whatever the dtype of coords
+    """
+    __slots__ = ("verts", "coords", "closed", "endpoints", "lengths", "fractions")
+
+    def __init__(self, verts, coords, closed=False):
+        self.verts = np.asarray(verts)
+        self.coords = np.asarray(coords, dtype=np.result_type(coords, np.float32)).reshape(-1, 3)
+        self.closed = closed
+
+        self.endpoints = np.zeros(len(self.verts), dtype=bool)
+        if not closed and len(self.verts):
+            self.endpoints[[0, -1]] = True
+
+        self.lengths = np.zeros(len(self.verts), dtype=self.coords.dtype)
+        self.lengths[1:] = np.linalg.norm(np.diff(self.coords, axis=0), axis=1)
+        running = np.cumsum(self.lengths, dtype=np.float64)
+        total = running[-1] if len(running) else 0.0
+        fractions = running / total if total > 0 else np.zeros_like(running)
+        self.fractions = fractions.astype(self.coords.dtype, copy=False)
+
+    def __len__(self):
+        return len(self.verts)
+
+
+class ChainSet:
+    """
+    Every chain walked on one object, with the vertex indices and coordinates of all of them concatenated so
+    they are read, validated and written back in one call each.
+
+    :ivar chains: List of Chain (or anything else with `verts` and `coords` attributes)
+    :ivar verts: (K,) vertex indices of all chains, in chain order
+    :ivar coords: (K, 3) coordinates of those vertices
+    """
+    __slots__ = ("chains", "verts", "coords")
+
+    def __init__(self, chains):
+        self.chains = list(chains)
+        if self.chains:
+            self.verts = np.concatenate([c.verts for c in self.chains])
+            self.coords = np.concatenate([c.coords for c in self.chains])
+        else:
+            self.verts = np.zeros(0, dtype=np.intp)
+            self.coords = np.zeros((0, 3))
+
+    def __len__(self):
+        return len(self.chains)
+
+    @classmethod
+    def read(cls, walked, read_coords):
+        """
+        :param walked: List of (verts, closed) tuples, as returned by walk_chains
+        :param read_coords: Function returning the current (K, 3) coordinates of the given vertex indices; it is
+                            called once for all chains
+        :return: ChainSet of Chain
+        """
+        if not walked:
+            return cls([])
+        verts = np.concatenate([v for v, _ in walked])
+        coords = np.split(read_coords(verts), np.cumsum([len(v) for v, _ in walked[:-1]]))
+        return cls(Chain(v, c, closed) for (v, closed), c in zip(walked, coords))
+
+
+# chains shorter than this in total are processed inline; threads only pay off on large NumPy calls
+PARALLEL_MIN_VERTS = 20000
+
+_pool = None
+
+
+def map_chains(func, chains):
+    """
+    Applies func to every chain, on the shared thread pool when there is enough work to split.
+
+    :param func: Function taking one chain; it must not touch bpy or bmesh data
+    :param chains: Sequence of chains (anything with `verts`)
+    :return: List of results, in the order of chains
+    """
+    global _pool
+    chains = list(chains)
+    if len(chains) < 2 or sum(len(c.verts) for c in chains) < PARALLEL_MIN_VERTS:
+        return [func(c) for c in chains]
+
+    workers = os.cpu_count() or 1
+    if _pool is None:
+        _pool = ThreadPool(workers)
+    # a few chunks per worker keeps them busy when chain lengths vary, without one task per tiny chain
+    return _pool.map(func, chains, chunksize=max(1, len(chains) // (4 * workers)))
+
+
+def shutdown_pool():
+    """ Stops the shared thread pool, if it was started; the next map_chains call starts a new one """
+    global _pool
+    if _pool is not None:
+        _pool.terminate()
+        _pool = None
+
+
+def buffer_digest(*arrays):
+    """
+    :param arrays: NumPy arrays
+    :return: Digest of the arrays' contents, shapes and dtypes
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        digest.update(repr((a.shape, a.dtype.str)).encode())
+        digest.update(a.data)
+    return digest.digest()
+
+
+class ChainCache:
+    """
+    Small LRU cache of walked chains and the quantities derived from them.
+
+    Entries are keyed by object and the selected edges, which fully determine the walked chains. Each entry
+    must have `verts` and `coords` attributes, as a Chain does; it is only returned while the current
+    coordinates of its vertices still equal the cached ones, which is the case when Blender re-runs an
+    operator from the redo panel.
+    """
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+
+    @staticmethod
+    def key(obj, selected_edges):
+        """
+        :param obj: Blender object the chains were walked on
+        :param selected_edges: (E, 2) vertex indices of the selected edges
+        :return: Hashable cache key
+        """
+        return obj.name_full, buffer_digest(selected_edges)
+
+    def get(self, key, read_coords):
+        """
+        :param key: ChainCache.key(...)
+        :param read_coords: Function returning the current (K, 3) coordinates of the given vertex indices
+        :return: The cached entry, or None if there is none or its vertices have moved since
+        """
+        entry = self.entries.get(key)
+        if entry is None or not np.array_equal(read_coords(entry.verts), entry.coords):
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return entry
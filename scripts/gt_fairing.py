@@ -0,0 +1,134 @@
+"""
+Fairing of ordered vertex chains as banded linear systems.
+
+A chain is faired by minimizing, over its free vertices x,
+
+    |x - x0|^2 + lambda * |D x|^2
+
+where x0 are the original positions and D takes first differences (LAPLACIAN: pulls every vertex toward its
+neighbors) or second differences at the free vertices (BILAPLACIAN: removes curvature noise while keeping
+the overall bend). Pinned vertices (chain ends, user-tagged vertices) are fixed boundary values, so they split
+the chain into independent segments and every segment's system is tridiagonal in its free vertices:
+
+    LAPLACIAN:    (I + lambda T) x = x0 + lambda g
+    BILAPLACIAN:  (I + lambda T^2) x = x0 + lambda T g
+
+with T = tridiag(-1, 2, -1) and g holding the pinned neighbors. I + lambda T^2 is pentadiagonal, but its inverse
+is the real part of (I + i a T)^-1 with a = sqrt(lambda), so it takes one complex tridiagonal solve.
+
+All segments of all chains are concatenated into one system (a pin simply leaves a zero off-diagonal) and solved
+by cyclic reduction: log2(n) vectorized NumPy passes of halving size, O(n) work in total, instead of a Python
+loop over the vertices as the Thomas algorithm would need.
+"""
+import numpy as np
+
+ORDERS = ("LAPLACIAN", "BILAPLACIAN")
+
+
+def solve_tridiagonal(lower, diag, upper, rhs):
+    """
+    Solves a tridiagonal system by cyclic reduction, without pivoting.
+
+    The matrix must be diagonally dominant (as every fairing system is) for the reduction to be stable.
+
+    :param lower: (n,) sub-diagonal; lower[i] multiplies x[i - 1], lower[0] is ignored
+    :param diag: (n,) diagonal
+    :param upper: (n,) super-diagonal; upper[i] multiplies x[i + 1], upper[-1] is ignored
+    :param rhs: (n,) or (n, k) right-hand side(s)
+    :return: Solution of the shape of rhs, real or complex as the inputs
+    """
+    dtype = np.result_type(lower, diag, upper, rhs, np.float64)
+    rhs = np.asarray(rhs, dtype=dtype)
+    n = len(rhs)
+    if n == 0:
+        return rhs.copy()
+
+    a = np.array(lower, dtype=dtype)
+    c = np.array(upper, dtype=dtype)
+    a[0] = 0
+    c[-1] = 0
+    # Right-hand sides as contiguous rows, so every NumPy call loops over the rows' n entries rather than k
+    d = np.ascontiguousarray(rhs.reshape(n, -1).T)
+    x = _cyclic_reduction(a, np.asarray(diag, dtype=dtype), c, d)
+    return x.T.reshape(rhs.shape)
+
+
+def _cyclic_reduction(a, b, c, d):
+    # a[0] and c[-1] are 0 and d is (k, n). The odd rows are reduced onto each other, solved recursively, and
+    # the even rows are then filled in from their known neighbors
+    n = len(b)
+    if n == 1:
+        return d / b
+    m = n // 2          # odd rows 1, 3, ..., 2m - 1
+    r = (n - 1) // 2    # the odd rows that have an even row after them (all but the last when n is even)
+
+    # Eliminate x[i - 1] and x[i + 1] from every odd row i with the even rows around it
+    alpha = -a[1::2] / b[0:2 * m:2]
+    gamma = -c[1:2 * r:2] / b[2::2]
+    a2 = alpha * a[0:2 * m:2]
+    b2 = b[1::2] + alpha * c[0:2 * m:2]
+    b2[:r] += gamma * a[2::2]
+    c2 = np.zeros_like(a2)
+    c2[:r] = gamma * c[2::2]
+    d2 = d[:, 1::2] + alpha * d[:, 0:2 * m:2]
+    d2[:, :r] += gamma * d[:, 2::2]
+    odd = _cyclic_reduction(a2, b2, c2, d2)
+
+    x = np.empty_like(d)
+    x[:, 1::2] = odd
+    even = x[:, 0::2]
+    even[:] = d[:, 0::2]
+    even[:, 1:] -= a[2::2] * odd[:, :even.shape[1] - 1]
+    even[:, :m] -= c[0:2 * m:2] * odd
+    even /= b[0::2]
+    return x
+
+
+def fair(coords, pinned, strength, order="BILAPLACIAN"):
+    """
+    Fairs concatenated chains, keeping the pinned vertices in place.
+
+    :param coords: (K, 3) vertex coordinates of all chains, in path order and concatenated
+    :param pinned: (K,) bool mask of the vertices that stay in place; the first and last vertex of every chain
+                   must be pinned, which also keeps neighboring chains from influencing each other
+    :param strength: Smoothing length in vertices (0 leaves the chains as they are); lambda is strength^2
+                     for LAPLACIAN and strength^4 for BILAPLACIAN, so both smooth over similar lengths
+    :param order: One of ORDERS
+    :return: (K, 3) faired coordinates, in the dtype of coords; solved in float64 either way
+    """
+    coords = np.asarray(coords)
+    pinned = np.asarray(pinned, dtype=bool)
+    result = coords.copy()
+    free = np.flatnonzero(~pinned)
+    if not len(free) or strength <= 0:
+        return result
+
+    # Free vertices next to a pin: their couplings drop out and the pin moves to the right-hand side (g)
+    off_lower = -(~pinned[free - 1]).astype(np.float64)
+    off_upper = -(~pinned[free + 1]).astype(np.float64)
+    rhs = coords[free].astype(np.float64)
+    g = np.zeros_like(rhs)
+    for side, off in ((-1, off_lower), (1, off_upper)):
+        rows = np.flatnonzero(off == 0)
+        g[rows] += coords[free[rows] + side]
+
+    if order == "LAPLACIAN":
+        lam = float(strength) ** 2
+        rhs += lam * g
+        x = solve_tridiagonal(lam * off_lower, np.full(len(free), 1 + 2 * lam), lam * off_upper, rhs)
+    else:
+        lam = float(strength) ** 4
+        a = np.sqrt(lam)
+        # rhs = x0 + lambda T g; g is only nonzero next to pins, so T g is too
+        rows = np.flatnonzero(g.any(axis=1))
+        for shift, off in ((0, None), (-1, off_upper), (1, off_lower)):
+            target = rows + shift
+            keep = (target >= 0) & (target < len(free))
+            weight = 2.0 if off is None else off[target[keep], np.newaxis]
+            np.add.at(rhs, target[keep], lam * weight * g[rows[keep]])
+        # (I + lambda T^2)^-1 = Re (I + i a T)^-1 for real right-hand sides, as 1 / (1 + a^2 t^2) is the real
+        # part of 1 / (1 + i a t): one complex tridiagonal solve instead of two
+        x = solve_tridiagonal(1j * a * off_lower, np.full(len(free), 1 + 2j * a), 1j * a * off_upper, rhs).real
+
+    result[free] = x
+    return result
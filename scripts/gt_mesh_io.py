@@ -0,0 +1,277 @@
+"""
+Bulk mesh I/O shared by the GT scripts.
+
+Geometry is moved between Blender meshes and flat NumPy buffers with foreach_get / foreach_set, so the
+cost is a memcpy per attribute instead of one Python object per vertex. Blender stores positions as
+float32 and indices as C ints, so buffers are allocated with those types to stay on the fast path.
+
+In edit mode the mesh data is stale until Blender converts the edit mesh back, which costs time in
+proportion to the whole mesh. EditModeMesh does that conversion once per operator run (without leaving edit
+mode, so the edit mesh is not rebuilt afterwards as a mode_set round trip would), reads the selection and
+coordinates from the mesh data in bulk, and writes the new coordinates of the selected vertices through
+bmesh one at a time.
+
+Coordinates are handed out as float64 unless float32 is asked for (GT_FLOAT32=1 in the environment, or
+use_float32()). The tools then keep Blender's float32 buffers end to end, with half the memory and no
+conversions, and only accumulate lengths and solve the projection in float64.
+"""
+import os
+
+import bmesh
+import numpy as np
+
+# dtype the tools work on vertex coordinates in, see use_float32()
+COORD_DTYPE = np.float32 if os.environ.get("GT_FLOAT32") else np.float64
+
+
+def use_float32(enabled=True):
+    """
+    Switches every tool to float32 coordinates (or back to float64) for the rest of the session.
+    """
+    global COORD_DTYPE
+    COORD_DTYPE = np.float32 if enabled else np.float64
+
+
+def read_vertex_coords(mesh, dtype=None):
+    """
+    Returns the coordinates of every vertex in the mesh.
+
+    :param mesh: Blender mesh
+    :param dtype: dtype of the returned array, COORD_DTYPE by default; float32 is returned without a copy
+    :return: (N, 3) array of vertex coordinates
+    """
+    dtype = COORD_DTYPE if dtype is None else dtype
+    coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coords)
+    return coords.reshape(-1, 3).astype(dtype, copy=False)
+
+
+def read_edge_vertices(mesh):
+    """
+    :param mesh: Blender mesh
+    :return: (E, 2) int32 array with the vertex indices of every edge
+    """
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edges)
+    return edges.reshape(-1, 2)
+
+
+def read_edge_select(mesh):
+    """
+    :param mesh: Blender mesh
+    :return: (E,) bool array of edge selection states
+    """
+    select = np.empty(len(mesh.edges), dtype=bool)
+    mesh.edges.foreach_get("select", select)
+    return select
+
+
+def read_polygon_loops(mesh):
+    """
+    Returns the polygons of the mesh as flat loop buffers.
+
+    :param mesh: Blender mesh
+    :return: Tuple (loop_starts, loop_totals, loop_verts) of int32 arrays. Polygon i uses the vertex
+             indices loop_verts[loop_starts[i]:loop_starts[i] + loop_totals[i]]
+    """
+    loop_starts = np.empty(len(mesh.polygons), dtype=np.int32)
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", loop_starts)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    mesh.loops.foreach_get("vertex_index", loop_verts)
+    return loop_starts, loop_totals, loop_verts
+
+
+def read_loop_edges(mesh):
+    """
+    :param mesh: Blender mesh
+    :return: (L,) int32 array with the edge index of every face corner (loop)
+    """
+    loop_edges = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("edge_index", loop_edges)
+    return loop_edges
+
+
+def write_vertex_coords(mesh, coords):
+    """
+    Writes vertex coordinates back to the mesh in one call.
+
+    :param mesh: Blender mesh
+    :param coords: (N, 3) coordinates for every vertex
+    """
+    buffer = np.ascontiguousarray(coords, dtype=np.float32).reshape(-1)
+    mesh.vertices.foreach_set("co", buffer)
+    mesh.update()
+
+
+def build_mesh(mesh, coords, edges=None, loop_starts=None, loop_totals=None, loop_verts=None):
+    """
+    Fills an empty mesh from flat buffers; the bulk equivalent of from_pydata.
+
+    :param mesh: Empty Blender mesh
+    :param coords: (N, 3) vertex coordinates
+    :param edges: Optional (E, 2) vertex index pairs
+    :param loop_starts: Optional (F,) start of each polygon in loop_verts
+    :param loop_totals: Optional (F,) vertex count of each polygon
+    :param loop_verts: Optional (L,) vertex indices of all polygons, concatenated
+    """
+    mesh.vertices.add(len(coords))
+    mesh.vertices.foreach_set("co", np.ascontiguousarray(coords, dtype=np.float32).reshape(-1))
+
+    if edges is not None and len(edges):
+        mesh.edges.add(len(edges))
+        mesh.edges.foreach_set("vertices", np.ascontiguousarray(edges, dtype=np.int32).reshape(-1))
+
+    has_faces = loop_starts is not None and len(loop_starts) > 0
+    if has_faces:
+        mesh.loops.add(len(loop_verts))
+        mesh.loops.foreach_set("vertex_index", np.ascontiguousarray(loop_verts, dtype=np.int32))
+        mesh.polygons.add(len(loop_starts))
+        mesh.polygons.foreach_set("loop_start", np.ascontiguousarray(loop_starts, dtype=np.int32))
+        # loop_total is derived from loop_start and read-only since Blender 4.0
+        if not mesh.polygons.bl_rna.properties["loop_total"].is_readonly:
+            mesh.polygons.foreach_set("loop_total", np.ascontiguousarray(loop_totals, dtype=np.int32))
+
+    mesh.update(calc_edges=has_faces)
+
+
+class ObjectModeMesh:
+    """
+    Selection and coordinate access for a mesh outside edit mode, through foreach_get / foreach_set.
+    """
+    def __init__(self, obj):
+        self.obj = obj
+        self.mesh = obj.data
+        self.all_coords = read_vertex_coords(self.mesh, dtype=np.float32)
+
+    def selected_edges(self):
+        """
+        :return: (E, 2) int32 array with the vertex indices of every selected edge
+        """
+        return read_edge_vertices(self.mesh)[read_edge_select(self.mesh)]
+
+    def coords(self, indices):
+        """
+        :param indices: Vertex indices
+        :return: (K, 3) COORD_DTYPE coordinates of the given vertices
+        """
+        return self.all_coords[indices].astype(COORD_DTYPE, copy=False)
+
+    def write_coords(self, indices, coords):
+        """
+        :param indices: (K,) vertex indices
+        :param coords: (K, 3) new coordinates of the given vertices
+        """
+        self.all_coords[indices] = coords
+        write_vertex_coords(self.mesh, self.all_coords)
+
+    def group_weights(self, name, indices):
+        """
+        :param name: Vertex group name
+        :param indices: Vertex indices
+        :return: (K,) float32 weights of the given vertices in the group, 0 where they are not in it (or the
+                 group does not exist)
+        """
+        # vertex groups have no bulk accessor; only the asked for vertices are looked up
+        weights = np.zeros(len(indices), dtype=np.float32)
+        group = self.obj.vertex_groups.get(name)
+        if group is not None:
+            for k, i in enumerate(np.ravel(indices).tolist()):
+                try:
+                    weights[k] = group.weight(i)
+                except RuntimeError:
+                    pass  # not in the group
+        return weights
+
+
+class EditModeMesh:
+    """
+    Selection and coordinate access for a mesh in edit mode, through bmesh and without leaving edit mode.
+
+    bmesh has no bulk accessors, so the edit mesh is synced into the mesh data once (update_from_editmode, a
+    C pass over the whole mesh, so every run still costs time in proportion to the mesh) and the selection and
+    coordinates are read from there with foreach_get. Only writing goes through bmesh, one Python call per
+    written vertex.
+    """
+    def __init__(self, obj):
+        self.obj = obj
+        self.mesh = obj.data
+        self.bm = bmesh.from_edit_mesh(self.mesh)
+        self.bm.verts.index_update()
+        self.bm.verts.ensure_lookup_table()
+        self.all_coords = None
+
+    def sync(self):
+        """ Brings the mesh data up to date with the edit mesh, on first use """
+        if self.all_coords is None:
+            # written in bmesh order, so the indices match the bmesh vertices
+            self.obj.update_from_editmode()
+            self.all_coords = read_vertex_coords(self.mesh, dtype=np.float32)
+
+    def selected_edges(self):
+        """
+        :return: (E, 2) int32 array with the vertex indices of every selected edge
+        """
+        self.sync()
+        return read_edge_vertices(self.mesh)[read_edge_select(self.mesh)]
+
+    def coords(self, indices):
+        """
+        :param indices: Vertex indices
+        :return: (K, 3) COORD_DTYPE coordinates of the given vertices
+        """
+        self.sync()
+        return self.all_coords[indices].astype(COORD_DTYPE, copy=False)
+
+    def write_coords(self, indices, coords):
+        """
+        :param indices: (K,) vertex indices
+        :param coords: (K, 3) new coordinates of the given vertices
+        """
+        verts = self.bm.verts
+        for i, co in zip(np.ravel(indices).tolist(), np.asarray(coords).tolist()):
+            verts[i].co = co
+        bmesh.update_edit_mesh(self.mesh, loop_triangles=False, destructive=False)
+        # the synced copy follows, so coordinates read afterwards are the new ones
+        if self.all_coords is not None:
+            self.all_coords[indices] = coords
+
+    def group_weights(self, name, indices):
+        """
+        :param name: Vertex group name
+        :param indices: Vertex indices
+        :return: (K,) float32 weights of the given vertices in the group, 0 where they are not in it (or the
+                 group does not exist)
+        """
+        group = self.obj.vertex_groups.get(name)
+        layer = self.bm.verts.layers.deform.active
+        if group is None or layer is None:
+            return np.zeros(len(indices), dtype=np.float32)
+        verts = self.bm.verts
+        return np.array([verts[i][layer].get(group.index, 0.0) for i in np.ravel(indices).tolist()],
+                        dtype=np.float32)
+
+
+def mesh_access(obj):
+    """
+    :param obj: Blender mesh object
+    :return: EditModeMesh if the object is in edit mode, otherwise ObjectModeMesh
+    """
+    return EditModeMesh(obj) if obj.mode == 'EDIT' else ObjectModeMesh(obj)
+
+
+def mesh_objects(context):
+    """
+    The objects an operator should work on: every mesh in edit mode (multi-object editing) when the active
+    object is in edit mode, otherwise the active object alone.
+
+    :param context: Blender context
+    :return: List of mesh objects, each with its own mesh data
+    """
+    obj = context.active_object
+    if obj is None or obj.type != 'MESH':
+        return []
+    if obj.mode == 'EDIT':
+        return [o for o in context.objects_in_mode_unique_data if o.type == 'MESH']
+    return [obj]
@@ -0,0 +1,319 @@
+"""
+Reading and writing polygon meshes as OBJ and PLY files, without bpy.
+
+Meshes use the same flat buffers as gt_mesh_io: (N, 3) coordinates plus loop_starts / loop_totals /
+loop_verts for the polygons. Readers convert text a chunk of lines at a time and writers emit a chunk of
+vertices or polygons at a time, so no Python object is kept per element and output goes to disk as it is
+formatted. Writers expect the polygons to be stored in order in loop_verts, as every mesh built here is.
+Only vertex positions and polygons are carried over; normals, UVs, colors and loose edges are ignored.
+"""
+import os
+from collections import namedtuple
+
+import numpy as np
+
+CHUNK_SIZE = 1 << 18
+
+MeshData = namedtuple("MeshData", ["coords", "loop_starts", "loop_totals", "loop_verts"])
+MeshData.__doc__ = """
+A polygon mesh as flat buffers. Polygon i uses the vertex indices
+loop_verts[loop_starts[i]:loop_starts[i] + loop_totals[i]].
+"""
+
+# PLY scalar types and their NumPy equivalents (both the old and the sized names are in use)
+PLY_TYPES = {
+    "char": "i1", "int8": "i1", "uchar": "u1", "uint8": "u1",
+    "short": "i2", "int16": "i2", "ushort": "u2", "uint16": "u2",
+    "int": "i4", "int32": "i4", "uint": "u4", "uint32": "u4",
+    "float": "f4", "float32": "f4", "double": "f8", "float64": "f8",
+}
+
+
+def polygon_buffers(polygons):
+    """
+    :param polygons: List of (L_i,) vertex index arrays, one per polygon, or an (F, L) array when every polygon
+                     has the same vertex count
+    :return: Tuple (loop_starts, loop_totals, loop_verts) of int32 arrays
+    """
+    if isinstance(polygons, np.ndarray):
+        loop_totals = np.full(len(polygons), polygons.shape[1], dtype=np.int32)
+        return ((np.cumsum(loop_totals) - loop_totals).astype(np.int32), loop_totals,
+                polygons.reshape(-1).astype(np.int32))
+    loop_totals = np.array([len(p) for p in polygons], dtype=np.int32)
+    loop_starts = (np.cumsum(loop_totals) - loop_totals).astype(np.int32)
+    loop_verts = np.concatenate(polygons).astype(np.int32) if polygons else np.zeros(0, dtype=np.int32)
+    return loop_starts, loop_totals, loop_verts
+
+
+def _join(chunks, dtype, width=None):
+    shape = (0,) if width is None else (0, width)
+    return np.concatenate(chunks).astype(dtype, copy=False) if chunks else np.zeros(shape, dtype=dtype)
+
+
+def read_obj(path, chunk_size=CHUNK_SIZE, dtype=np.float64):
+    """
+    Reads the vertices and faces of a Wavefront OBJ file.
+
+    :param path: File path
+    :param chunk_size: Number of lines converted to arrays at a time
+    :param dtype: dtype of the coordinates; each chunk is parsed as float64 and converted on its own
+    :return: MeshData
+    """
+    coord_chunks, vert_lines = [], []
+    total_chunks, index_chunks, face_totals, face_indices = [], [], [], []
+    vert_count = 0
+
+    def flush_verts():
+        nonlocal vert_count
+        if vert_lines:
+            coords = np.array(" ".join(vert_lines).split(), dtype=np.float64).reshape(len(vert_lines), -1)
+            coord_chunks.append(coords[:, :3].astype(dtype))
+            vert_count += len(vert_lines)
+            vert_lines.clear()
+
+    def flush_faces():
+        if face_totals:
+            total_chunks.append(np.array(face_totals, dtype=np.int32))
+            index_chunks.append(np.array(face_indices, dtype=np.int64))
+            face_totals.clear()
+            face_indices.clear()
+
+    with open(path) as f:
+        for line in f:
+            if line.startswith("v "):
+                vert_lines.append(line[2:])
+                if len(vert_lines) >= chunk_size:
+                    flush_verts()
+            elif line.startswith("f "):
+                # "f v", "f v/vt", "f v//vn" or "f v/vt/vn"; negative indices count back from the last vertex
+                corners = [int(c.split("/", 1)[0]) for c in line.split()[1:]]
+                flush_verts()
+                face_totals.append(len(corners))
+                face_indices.extend(c - 1 if c > 0 else vert_count + c for c in corners)
+                if len(face_totals) >= chunk_size:
+                    flush_faces()
+    flush_verts()
+    flush_faces()
+
+    loop_totals = _join(total_chunks, np.int32)
+    return MeshData(_join(coord_chunks, dtype, 3), (np.cumsum(loop_totals) - loop_totals).astype(np.int32),
+                    loop_totals, _join(index_chunks, np.int32))
+
+
+def _read_ply_header(f):
+    """
+    :return: Tuple (format, elements); elements is a list of (name, count, properties) and every property is
+             (name, type) or (name, (count type, item type)) for lists
+    """
+    if f.readline().strip() != b"ply":
+        raise ValueError("not a PLY file")
+    fmt, elements = None, []
+    for line in f:
+        words = line.decode("ascii").split()
+        if not words or words[0] in ("comment", "obj_info"):
+            continue
+        if words[0] == "format":
+            fmt = words[1]
+        elif words[0] == "element":
+            elements.append((words[1], int(words[2]), []))
+        elif words[0] == "property":
+            if words[1] == "list":
+                elements[-1][2].append((words[4], (PLY_TYPES[words[2]], PLY_TYPES[words[3]])))
+            else:
+                elements[-1][2].append((words[2], PLY_TYPES[words[1]]))
+        elif words[0] == "end_header":
+            return fmt, elements
+    raise ValueError("PLY header has no end_header")
+
+
+def _read_ply_ascii_element(f, count, properties, chunk_size):
+    """
+    :return: Dict of property name -> array, or a list of arrays for list properties
+    """
+    if not any(isinstance(t, tuple) for _, t in properties):
+        chunks = []
+        for i in range(0, count, chunk_size):
+            lines = [f.readline() for _ in range(min(chunk_size, count - i))]
+            chunks.append(np.array(b" ".join(lines).split(), dtype=np.float64).reshape(len(lines), -1))
+        values = _join(chunks, np.float64, len(properties))
+        return {name: values[:, k] for k, (name, _) in enumerate(properties)}
+
+    # Rows of varying length; only the list itself is kept (scalars next to it are dropped)
+    lists = []
+    for _ in range(count):
+        words = f.readline().split()
+        k = 0
+        for name, t in properties:
+            if isinstance(t, tuple):
+                n = int(words[k])
+                lists.append(np.array(words[k + 1:k + 1 + n], dtype=np.int64))
+                k += 1 + n
+            else:
+                k += 1
+    return {name: lists for name, t in properties if isinstance(t, tuple)}
+
+
+def _read_ply_binary_element(f, count, properties, byte_order, chunk_size):
+    """
+    :return: Dict of property name -> array, or a list of arrays for list properties
+    """
+    if not any(isinstance(t, tuple) for _, t in properties):
+        dtype = np.dtype([(name, byte_order + t) for name, t in properties])
+        values = np.fromfile(f, dtype=dtype, count=count)
+        if len(values) != count:
+            raise ValueError("PLY file ends early")
+        return {name: values[name] for name, _ in properties}
+
+    # Lists of one fixed length (all triangles, all quads, ...) are read as one structured block
+    start = f.tell()
+    if len(properties) == 1:
+        name, (count_type, item_type) = properties[0]
+        first = np.fromfile(f, dtype=byte_order + count_type, count=1)
+        if len(first):
+            n = int(first[0])
+            dtype = np.dtype([("n", byte_order + count_type), ("items", byte_order + item_type, (n,))])
+            f.seek(start)
+            values = np.fromfile(f, dtype=dtype, count=count)
+            if len(values) == count and np.all(values["n"] == n):
+                return {name: values["items"]}
+        f.seek(start)
+
+    # Mixed lengths: walk the rows one at a time
+    lists = []
+    for _ in range(count):
+        for name, t in properties:
+            if isinstance(t, tuple):
+                n = int(np.fromfile(f, dtype=byte_order + t[0], count=1)[0])
+                lists.append(np.fromfile(f, dtype=byte_order + t[1], count=n).astype(np.int64))
+            else:
+                f.seek(np.dtype(t).itemsize, os.SEEK_CUR)
+    return {name: lists for name, t in properties if isinstance(t, tuple)}
+
+
+def read_ply(path, chunk_size=CHUNK_SIZE, dtype=np.float64):
+    """
+    Reads the vertices and faces of an ASCII or binary PLY file.
+
+    :param path: File path
+    :param chunk_size: Number of ASCII rows converted to arrays at a time
+    :param dtype: dtype of the coordinates
+    :return: MeshData
+    """
+    with open(path, "rb") as f:
+        fmt, elements = _read_ply_header(f)
+        if fmt not in ("ascii", "binary_little_endian", "binary_big_endian"):
+            raise ValueError(f"unsupported PLY format {fmt!r}")
+        byte_order = "<" if fmt == "binary_little_endian" else ">"
+
+        coords = np.zeros((0, 3), dtype=dtype)
+        polygons = []
+        for name, count, properties in elements:
+            if fmt == "ascii":
+                values = _read_ply_ascii_element(f, count, properties, chunk_size)
+            else:
+                values = _read_ply_binary_element(f, count, properties, byte_order, chunk_size)
+            if name == "vertex":
+                coords = np.stack([values[axis] for axis in "xyz"], axis=1).astype(dtype, copy=False)
+            elif name == "face":
+                polygons = values.get("vertex_indices", values.get("vertex_index", []))
+
+    return MeshData(coords, *polygon_buffers(polygons))
+
+
+def write_obj(path, mesh, chunk_size=CHUNK_SIZE):
+    """
+    Writes a mesh as a Wavefront OBJ file.
+
+    :param path: File path
+    :param mesh: MeshData (or a projection_core.Shell)
+    :param chunk_size: Number of vertices or polygons formatted at a time
+    """
+    loop_starts = np.asarray(mesh.loop_starts, dtype=np.int64)
+    loop_totals = np.asarray(mesh.loop_totals, dtype=np.int64)
+    loop_verts = np.asarray(mesh.loop_verts, dtype=np.int64) + 1
+
+    # A whole chunk is formatted by one % operation on a repeated line template
+    face_lines = {}
+    with open(path, "w") as f:
+        for i in range(0, len(mesh.coords), chunk_size):
+            coords = np.asarray(mesh.coords[i:i + chunk_size], dtype=np.float64)
+            f.write(("v %.7g %.7g %.7g\n" * len(coords)) % tuple(coords.ravel().tolist()))
+
+        for i in range(0, len(loop_starts), chunk_size):
+            starts, totals = loop_starts[i:i + chunk_size], loop_totals[i:i + chunk_size]
+            first, count = int(starts[0]), int(totals.sum())
+            template = "".join(face_lines.get(t) or face_lines.setdefault(t, "f" + " %d" * t + "\n")
+                               for t in totals.tolist())
+            f.write(template % tuple(loop_verts[first:first + count].tolist()))
+
+
+def write_ply(path, mesh, chunk_size=CHUNK_SIZE):
+    """
+    Writes a mesh as a little-endian binary PLY file with float vertices and int vertex_indices lists.
+
+    :param path: File path
+    :param mesh: MeshData (or a projection_core.Shell)
+    :param chunk_size: Number of vertices or polygons converted at a time
+    """
+    loop_starts = np.asarray(mesh.loop_starts, dtype=np.int64)
+    loop_totals = np.asarray(mesh.loop_totals, dtype=np.int64)
+    loop_verts = np.asarray(mesh.loop_verts)
+    # uchar counts are what most readers expect, but only go up to 255 corners; a bigger n-gon (e.g. a filled
+    # circle) needs the wider count type, which would otherwise silently wrap around
+    if len(loop_totals) and loop_totals.max() > 255:
+        count_type, count_dtype = "uint", "<u4"
+    else:
+        count_type, count_dtype = "uchar", "u1"
+    count_width = np.dtype(count_dtype).itemsize
+    header = ("ply\nformat binary_little_endian 1.0\n"
+              f"element vertex {len(mesh.coords)}\n"
+              "property float x\nproperty float y\nproperty float z\n"
+              f"element face {len(loop_starts)}\n"
+              f"property list {count_type} int vertex_indices\nend_header\n")
+
+    with open(path, "wb") as f:
+        f.write(header.encode("ascii"))
+        for i in range(0, len(mesh.coords), chunk_size):
+            f.write(np.ascontiguousarray(mesh.coords[i:i + chunk_size], dtype="<f4").tobytes())
+
+        for i in range(0, len(loop_starts), chunk_size):
+            starts, totals = loop_starts[i:i + chunk_size], loop_totals[i:i + chunk_size]
+            first, count = int(starts[0]), int(totals.sum())
+
+            # Every row is the count (count_width bytes) followed by 4 bytes per vertex index
+            row_offsets = count_width * np.arange(len(starts)) + 4 * (starts - first)
+            buffer = np.empty(count_width * len(starts) + 4 * count, dtype=np.uint8)
+            counts = np.ascontiguousarray(totals, dtype=count_dtype).view(np.uint8)
+            buffer[row_offsets[:, np.newaxis] + np.arange(count_width)] = counts.reshape(-1, count_width)
+            item_offsets = (np.repeat(row_offsets + count_width - 4 * (starts - first), totals)
+                            + 4 * np.arange(count))
+            items = np.ascontiguousarray(loop_verts[first:first + count], dtype="<i4").view(np.uint8)
+            buffer[item_offsets[:, np.newaxis] + np.arange(4)] = items.reshape(-1, 4)
+            f.write(buffer.tobytes())
+
+
+READERS = {".obj": read_obj, ".ply": read_ply}
+WRITERS = {".obj": write_obj, ".ply": write_ply}
+
+
+def read_mesh(path, chunk_size=CHUNK_SIZE, dtype=np.float64):
+    """
+    Reads an OBJ or PLY file, picked by extension.
+
+    :param dtype: dtype of the coordinates
+    :return: MeshData
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in READERS:
+        raise ValueError(f"unsupported mesh file {path!r}; expected one of {', '.join(READERS)}")
+    return READERS[ext](path, chunk_size, dtype)
+
+
+def write_mesh(path, mesh, chunk_size=CHUNK_SIZE):
+    """
+    Writes an OBJ or PLY file, picked by extension.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in WRITERS:
+        raise ValueError(f"unsupported mesh file {path!r}; expected one of {', '.join(WRITERS)}")
+    WRITERS[ext](path, mesh, chunk_size)
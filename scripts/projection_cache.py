@@ -0,0 +1,192 @@
+"""
+Cache of stereographic shell components, in memory and optionally on disk.
+
+A shell is assembled from parts that depend on different inputs, and each part is cached on its own:
+
+- topology: shell edges and polygons, from the source polygons and edges only
+- outer / inner: the source vertices projected onto one sphere, from the source coordinates, the center,
+  that sphere's radius and the point light
+- orientation: whether the assembled shell has to be flipped, from the topology and outer surface keys.
+  The inner surface lies on the same rays from the point light, closer to the center, so it cannot change
+  which way the shell faces
+
+So changing only wall_thickness reprojects only the inner surface, and moving vertices without changing
+the topology reuses the walls and polygons. Keys are digests of the buffers plus the exact parameter values.
+On disk every entry is one .npz file named by its key; the directory can be emptied at any time.
+"""
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+import gt_profile
+from gt_chain import buffer_digest
+from projection_core import (CHUNK_SIZE, Shell, check_wall, project_vertices, reverse_polygons,
+                             shell_topology, signed_volume)
+
+COMPONENTS = ("topology", "outer", "inner", "orientation")
+
+
+def _digest(*values):
+    """
+    :return: Hex digest of the repr of plain Python values (floats repr exactly)
+    """
+    return hashlib.blake2b(repr(values).encode(), digest_size=16).hexdigest()
+
+
+class ProjectionCache:
+    """
+    LRU cache of shell components, backed by an optional directory of .npz files.
+
+    :ivar stats: Dict of component -> {"hits": ..., "disk_hits": ..., "misses": ...}
+    """
+    def __init__(self, directory=None, max_bytes=1 << 30):
+        """
+        :param directory: Directory for the on-disk cache, created if needed; None keeps entries in memory only
+        :param max_bytes: Size of the arrays kept in memory; the most recent entry is always kept
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.stats = {name: {"hits": 0, "disk_hits": 0, "misses": 0} for name in COMPONENTS}
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    def get(self, component, key):
+        """
+        :param component: One of COMPONENTS
+        :param key: Hex key of the entry
+        :return: Tuple of read-only arrays, or None on a miss
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.stats[component]["hits"] += 1
+            return entry
+
+        if self.directory is not None and os.path.exists(self._path(key)):
+            try:
+                with np.load(self._path(key), allow_pickle=False) as data:
+                    entry = tuple(data[f"arr_{i}"] for i in range(len(data.files)))
+            except (OSError, ValueError, KeyError):
+                entry = None  # a partly written or foreign file is treated as a miss and overwritten
+            if entry is not None:
+                self.stats[component]["disk_hits"] += 1
+                return self._remember(key, entry)
+
+        self.stats[component]["misses"] += 1
+        return None
+
+    def put(self, key, *arrays):
+        """
+        Stores an entry in memory and, with a directory, on disk.
+
+        :param key: Hex key of the entry
+        :param arrays: Arrays making up the entry
+        :return: The entry, as a tuple of read-only arrays
+        """
+        entry = self._remember(key, arrays)
+        if self.directory is not None:
+            # Write next to the target and rename, so readers never see a partial file
+            fd, temp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.savez(f, *entry)
+                os.replace(temp, self._path(key))
+            except OSError:
+                if os.path.exists(temp):
+                    os.unlink(temp)
+                raise
+        return entry
+
+    def _remember(self, key, arrays):
+        entry = tuple(np.asarray(a) for a in arrays)
+        for a in entry:
+            a.flags.writeable = False
+        if key in self.entries:
+            self.nbytes -= sum(a.nbytes for a in self.entries.pop(key))
+        self.entries[key] = entry
+        self.nbytes += sum(a.nbytes for a in entry)
+        while self.nbytes > self.max_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.nbytes -= sum(a.nbytes for a in evicted)
+        return entry
+
+    def clear(self):
+        """ Empties the memory cache and resets the stats; files on disk are kept """
+        self.entries.clear()
+        self.nbytes = 0
+        for counts in self.stats.values():
+            counts.update(hits=0, disk_hits=0, misses=0)
+
+    def summary(self):
+        """
+        :return: One line of hit / disk hit / miss counts per component
+        """
+        counts = ", ".join(f"{name} {c['hits']}/{c['disk_hits']}/{c['misses']}" for name, c in self.stats.items())
+        return counts + " (hits/disk hits/misses)"
+
+    def shell(self, coords, loop_starts, loop_totals, loop_verts, center, radius, thickness, point_light,
+              edges=None, loop_edges=None, chunk_size=CHUNK_SIZE, workers=1):
+        """
+        Same as projection_core.stereographic_shell, reusing every component that is still cached.
+
+        :return: Shell; its arrays may be shared with the cache and are read-only
+        :raises ValueError: If any vertex misses the sphere, or the wall thickness is not within (0, radius)
+        """
+        # the orientation key leaves out the inner surface, which only holds while it is inside the outer one
+        check_wall(radius, thickness)
+        vert_count = len(coords)
+        loop_starts = np.asarray(loop_starts, dtype=np.int32)
+        loop_totals = np.asarray(loop_totals, dtype=np.int32)
+        loop_verts = np.asarray(loop_verts, dtype=np.int32)
+        edges = np.zeros((0, 2), dtype=np.int32) if edges is None else np.asarray(edges, dtype=np.int32)
+
+        # Topology: boundary, walls and every polygon's winding
+        topology_key = "topology-" + buffer_digest(np.int64(vert_count), loop_starts, loop_totals, loop_verts,
+                                                   edges).hex()
+        topology = self.get("topology", topology_key)
+        if topology is None:
+            with gt_profile.phase("topology", polygons=len(loop_starts)):
+                topology = self.put(topology_key, *shell_topology(loop_starts, loop_totals, loop_verts,
+                                                                  vert_count, edges, loop_edges))
+        shell_edges, starts, totals, verts = topology
+
+        # Outer and inner surfaces; only the missing ones are projected, in one pass
+        # float32 and float64 sources give shells of their own dtype, so the dtype is part of the key
+        source = buffer_digest(np.asarray(coords)).hex()
+        surfaces = {}
+        missing = []
+        for name, r in (("outer", radius), ("inner", radius - thickness)):
+            key = f"{name}-{source}-{_digest(tuple(map(float, center)), float(r), tuple(map(float, point_light)))}"
+            cached = self.get(name, key)
+            surfaces[name] = (key, cached[0] if cached is not None else None)
+            if cached is None:
+                missing.append((name, key, r))
+        if missing:
+            with gt_profile.phase("project", vertices=vert_count, surfaces=len(missing)):
+                points = project_vertices(coords, center, [r for _, _, r in missing], point_light, chunk_size,
+                                          workers)
+            for (name, key, _), surface in zip(missing, points):
+                surfaces[name] = (key, self.put(key, surface)[0])
+
+        (outer_key, outer), (_, inner) = surfaces["outer"], surfaces["inner"]
+        shell_coords = np.concatenate((outer, inner))
+
+        # Orientation of the assembled shell
+        orientation_key = "orientation-" + _digest(topology_key, outer_key)
+        orientation = self.get("orientation", orientation_key)
+        if orientation is None:
+            with gt_profile.phase("orient", polygons=len(starts)):
+                inward = signed_volume(shell_coords, starts, totals, verts, chunk_size) < 0
+            orientation = self.put(orientation_key, np.array([inward]))
+        if orientation[0]:
+            verts = reverse_polygons(starts, totals, verts)
+
+        return Shell(shell_coords, shell_edges, starts, totals, verts)
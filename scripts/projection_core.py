@@ -0,0 +1,491 @@
+"""
+Stereographic shell construction without bpy.
+
+The shell is the source mesh projected toward a point light onto two concentric spheres (the outer and inner
+surface) and closed by walls along the source boundary. Everything works on flat NumPy buffers, so the same
+code runs inside Blender (projection.py) and on the command line (stereographic_cli.py).
+
+Vertices are projected in fixed-size chunks: the float64 temporaries of the intersection solve then never
+grow with the mesh, only the compact output buffers do. Those follow the source coordinates, so float32
+sources give float32 shells at half the memory, while the solve itself stays in float64. Very large meshes can be split across worker
+processes that share the source and result through one memory-mapped buffer.
+"""
+import atexit
+import multiprocessing
+import os
+import tempfile
+from collections import namedtuple
+
+import numpy as np
+
+import gt_profile
+
+# vertices (or polygons) per chunk of temporaries
+CHUNK_SIZE = 1 << 18
+
+Shell = namedtuple("Shell", ["coords", "edges", "loop_starts", "loop_totals", "loop_verts"])
+Shell.__doc__ = """
+A closed stereographic shell as flat buffers. coords holds the outer shell vertices followed by the inner
+ones; polygon i uses the vertex indices loop_verts[loop_starts[i]:loop_starts[i] + loop_totals[i]].
+"""
+
+
+def line_sphere_intersections(origins, target, center, radii):
+    """
+    Finds where the segments from every origin to a shared target cross one or more concentric spheres.
+
+    All vertices and all radii are solved in a single batched pass. Of the (up to) two roots that lie on
+    the segment, the one closest to the origin is kept, which matches taking the last entry of the
+    per-vertex intersection list this replaces.
+
+    :param origins: (N, 3) array of segment start points (the source vertices)
+    :param target: End point shared by every segment (the point light)
+    :param center: Center of the spheres
+    :param radii: A single radius or a sequence of K radii
+    :return: Tuple (points, hit, hit_count). points is a (K, N, 3) array (NaN where there is no
+             intersection) of the origins' dtype (float32 or float64), hit is a (K, N) bool mask and
+             hit_count is a (K, N) uint8 array with the number of roots (0, 1 or 2) on each segment
+    """
+    # The discriminant cancels badly in float32 for rays grazing the sphere, so the solve is float64
+    dtype = np.result_type(origins, np.float32)
+    origins = np.asarray(origins, dtype=np.float64).reshape(-1, 3)
+    target = np.asarray(target, dtype=np.float64)
+    center = np.asarray(center, dtype=np.float64)
+    radii = np.atleast_1d(np.asarray(radii, dtype=np.float64))
+
+    # Direction vector of each line and vector from sphere center to each first vertex
+    line_dir = target - origins
+    vec = origins - center
+
+    # Coefficients for the quadratic equations (a*t^2 + b*t + c = 0), one row per radius
+    a = np.einsum('ij,ij->i', line_dir, line_dir)
+    b = 2 * np.einsum('ij,ij->i', vec, line_dir)
+    c = np.einsum('ij,ij->i', vec, vec)[np.newaxis, :] - radii[:, np.newaxis] ** 2
+
+    discriminant = b ** 2 - 4 * a * c
+    solvable = (discriminant >= 0) & (a > 0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sqrt_discriminant = np.sqrt(np.where(solvable, discriminant, 0.0))
+        t1 = (-b + sqrt_discriminant) / (2 * a)
+        t2 = (-b - sqrt_discriminant) / (2 * a)
+
+    # Only roots on the segment (0 <= t <= 1) count; prefer t2, the root nearest the origin
+    t1_hit = solvable & (t1 >= 0) & (t1 <= 1)
+    t2_hit = solvable & (t2 >= 0) & (t2 <= 1)
+    hit = t1_hit | t2_hit
+    t = np.where(t2_hit, t2, np.where(t1_hit, t1, np.nan))
+
+    points = origins[np.newaxis, :, :] + t[:, :, np.newaxis] * line_dir[np.newaxis, :, :]
+
+    return points.astype(dtype, copy=False), hit, t1_hit.astype(np.uint8) + t2_hit
+
+
+def polygon_edges(loop_starts, loop_totals, loop_verts):
+    """
+    Directed edges of every polygon, following each polygon's winding.
+
+    :param loop_starts: (F,) start of each polygon in loop_verts
+    :param loop_totals: (F,) vertex count of each polygon
+    :param loop_verts: (L,) vertex indices of all polygons, concatenated
+    :return: (L, 2) array; row i runs from loop_verts[i] to the next vertex of the same polygon
+    """
+    loop_starts = np.asarray(loop_starts, dtype=np.intp)
+    loop_verts = np.asarray(loop_verts)
+    following = np.arange(1, len(loop_verts) + 1)
+    following[loop_starts + np.asarray(loop_totals, dtype=np.intp) - 1] = loop_starts
+    return np.stack((loop_verts, loop_verts[following]), axis=1)
+
+
+def boundary_edges(loop_starts, loop_totals, loop_verts, loop_edges=None):
+    """
+    Finds the edges that belong to exactly one polygon.
+
+    :param loop_starts: (F,) start of each polygon in loop_verts
+    :param loop_totals: (F,) vertex count of each polygon
+    :param loop_verts: (L,) vertex indices of all polygons, concatenated
+    :param loop_edges: Optional (L,) edge index of every loop (Blender's loop edge_index); derived from the
+                       vertex pairs when not given
+    :return: (B, 2) array of boundary edges, each directed along the winding of the polygon it belongs to
+    """
+    directed = polygon_edges(loop_starts, loop_totals, loop_verts)
+    if not len(directed):
+        return directed
+
+    if loop_edges is None:
+        # Number the undirected edges by a single int64 key per vertex pair
+        pairs = np.sort(directed, axis=1).astype(np.int64)
+        _, loop_edges = np.unique(pairs[:, 0] * (int(pairs.max()) + 1) + pairs[:, 1], return_inverse=True)
+
+    loop_edges = np.asarray(loop_edges).reshape(-1)
+    face_count = np.bincount(loop_edges)
+    return directed[face_count[loop_edges] == 1]
+
+
+def wall_faces(boundary, vert_count):
+    """
+    Quads joining every boundary edge of the outer shell to the same edge of the inner shell.
+
+    A boundary edge a -> b follows the winding of its outer face, so its quad runs b, a, a', b' (primes
+    being inner copies). That walks every shared edge against the direction of its neighbour: the outer
+    face, the reversed inner face and the adjacent quads.
+
+    :param boundary: (B, 2) boundary edges of the source mesh, directed along their face's winding
+    :param vert_count: Number of source vertices; inner shell vertex i is vertex i + vert_count
+    :return: Tuple (edges, quads). edges is (V, 2), one edge per boundary vertex joining it to its inner
+             copy, and quads is (B, 4)
+    """
+    boundary = np.asarray(boundary).reshape(-1, 2)
+    perimeter = np.unique(boundary)
+    edges = np.stack((perimeter, perimeter + vert_count), axis=1)
+    quads = np.concatenate((boundary[:, ::-1], boundary + vert_count), axis=1)
+    return edges, quads
+
+
+def reverse_polygons(loop_starts, loop_totals, loop_verts):
+    """
+    Reverses the winding of every polygon, flipping its normal.
+
+    :param loop_starts: (F,) start of each polygon in loop_verts
+    :param loop_totals: (F,) vertex count of each polygon
+    :param loop_verts: (L,) vertex indices of all polygons, concatenated
+    :return: (L,) loop_verts with each polygon's vertices in reverse order
+    """
+    loop_starts = np.asarray(loop_starts, dtype=np.intp)
+    loop_totals = np.asarray(loop_totals, dtype=np.intp)
+    mirror = np.repeat(2 * loop_starts + loop_totals - 1, loop_totals) - np.arange(len(loop_verts))
+    return np.asarray(loop_verts)[mirror]
+
+
+def signed_volume(coords, loop_starts, loop_totals, loop_verts, chunk_size=CHUNK_SIZE):
+    """
+    Volume enclosed by a closed surface; positive when the polygons wind counter-clockwise seen from outside.
+
+    :param coords: (N, 3) vertex coordinates
+    :param loop_starts: (F,) start of each polygon in loop_verts
+    :param loop_totals: (F,) vertex count of each polygon
+    :param loop_verts: (L,) vertex indices of all polygons, concatenated
+    :param chunk_size: Number of polygons summed at a time
+    :return: Signed volume
+    """
+    loop_starts = np.asarray(loop_starts, dtype=np.intp)
+    loop_totals = np.asarray(loop_totals, dtype=np.intp)
+    loop_verts = np.asarray(loop_verts)
+
+    volume = 0.0
+    for i in range(0, len(loop_starts), chunk_size):
+        starts, totals = loop_starts[i:i + chunk_size], loop_totals[i:i + chunk_size]
+
+        # Fan every polygon into triangles (first, j, j + 1) and sum their signed tetrahedron volumes
+        fans = totals - 2
+        first = np.repeat(starts, fans)
+        j = first + 1 + np.arange(len(first)) - np.repeat(np.cumsum(fans) - fans, fans)
+
+        a = np.asarray(coords[loop_verts[first]], dtype=np.float64)
+        b = np.asarray(coords[loop_verts[j]], dtype=np.float64)
+        c = np.asarray(coords[loop_verts[j + 1]], dtype=np.float64)
+        volume += np.einsum('ij,ij->', a, np.cross(b, c))
+    return volume / 6
+
+
+def shell_faces(loop_starts, loop_totals, loop_verts, vert_count, boundary):
+    """
+    Polygons of the closed shell: the outer copy of the source, the inner copy and the connecting walls.
+
+    Winding is emitted directly instead of being repaired afterwards. The outer shell keeps the source
+    winding, the inner shell is reversed so it faces the other way, and the walls follow the boundary
+    direction (see wall_faces). The source polygons must be consistently wound.
+
+    :param loop_starts: (F,) start of each source polygon in loop_verts
+    :param loop_totals: (F,) vertex count of each source polygon
+    :param loop_verts: (L,) vertex indices of all source polygons, concatenated
+    :param vert_count: Number of source vertices; inner shell vertex i is vertex i + vert_count
+    :param boundary: (B, 2) boundary edges of the source, from boundary_edges(...)
+    :return: Tuple (edges, loop_starts, loop_totals, loop_verts); edges are the connecting wall edges
+    """
+    loop_starts = np.asarray(loop_starts, dtype=np.int32)
+    loop_totals = np.asarray(loop_totals, dtype=np.int32)
+    loop_verts = np.asarray(loop_verts, dtype=np.int32)
+
+    c_edges, c_faces = wall_faces(boundary, vert_count)
+    loop_count = len(loop_verts)
+
+    starts = np.concatenate((loop_starts, loop_starts + loop_count,
+                             2 * loop_count + 4 * np.arange(len(c_faces), dtype=np.int32)))
+    totals = np.concatenate((loop_totals, loop_totals, np.full(len(c_faces), 4, dtype=np.int32)))
+    verts = np.concatenate((loop_verts, reverse_polygons(loop_starts, loop_totals, loop_verts) + vert_count,
+                            c_faces.reshape(-1))).astype(np.int32)
+    return c_edges, starts, totals, verts
+
+
+def orient_outward(coords, loop_starts, loop_totals, loop_verts, chunk_size=CHUNK_SIZE):
+    """
+    Flips every polygon of a consistently wound closed shell if its normals point inward.
+
+    :return: (L,) loop_verts, reversed per polygon if the signed volume was negative
+    """
+    if signed_volume(coords, loop_starts, loop_totals, loop_verts, chunk_size) < 0:
+        return reverse_polygons(loop_starts, loop_totals, loop_verts)
+    return loop_verts
+
+
+def _project_range(coords, points, first, last, center, radii, point_light, chunk_size):
+    """
+    Projects vertices first..last-1 of coords into the same rows of points, a chunk at a time.
+
+    :return: (K,) number of vertices that hit each sphere
+    """
+    vertices_hit = np.zeros(len(radii), dtype=np.int64)
+    for i in range(first, last, chunk_size):
+        j = min(i + chunk_size, last)
+        chunk, hit, _ = line_sphere_intersections(coords[i:j], point_light, center, radii)
+        points[:, i:j] = chunk
+        vertices_hit += np.count_nonzero(hit, axis=1)
+    return vertices_hit
+
+
+def _project_shared(path, dtype, vert_count, first, last, center, radii, point_light, chunk_size):
+    # Worker process: map the shared file and fill its own slice of the output in place
+    radii = np.asarray(radii)
+    coords = np.memmap(path, dtype=dtype, mode='r', shape=(vert_count, 3))
+    points = np.memmap(path, dtype=dtype, mode='r+', offset=coords.nbytes,
+                       shape=(len(radii), vert_count, 3))
+    vertices_hit = _project_range(coords, points, first, last, center, radii, point_light, chunk_size)
+    points.flush()
+    return vertices_hit
+
+
+def _remove_shared(path, retry=True):
+    # The mapping stays valid once the name is gone; where the file cannot be removed yet, retry at exit
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    except OSError:
+        if retry:
+            atexit.register(_remove_shared, path, False)
+
+
+def _shared_dir(size):
+    # A RAM-backed directory where there is one with room for the file, so it never touches the disk. Writing
+    # past the end of a full tmpfs through a mapping kills the process with SIGBUS instead of raising, and
+    # containers often have a /dev/shm of only 64 MB; otherwise the default temp directory is used
+    try:
+        stat = os.statvfs("/dev/shm")
+    except (AttributeError, OSError):
+        return None
+    return "/dev/shm" if stat.f_bavail * stat.f_frsize >= size else None
+
+
+def project_vertices(coords, center, radii, point_light, chunk_size=CHUNK_SIZE, workers=1):
+    """
+    Projects every vertex toward the point light onto each of the given sphere radii, a chunk at a time.
+
+    With workers > 1 the vertex range is split across worker processes. The source coordinates and the
+    result live in one memory-mapped file (in /dev/shm where it has room) that every process maps, so workers
+    write their slice of the result in place and nothing is pickled or copied back. The returned array is a
+    view of that mapping.
+
+    :param coords: (N, 3) source vertex coordinates
+    :param center: Center of the spheres
+    :param radii: Sequence of K sphere radii
+    :param point_light: Point every vertex is projected toward
+    :param chunk_size: Number of vertices solved at a time (per worker)
+    :param workers: Number of processes; 1 (or a mesh of at most chunk_size vertices) projects in this process
+    :return: (K, N, 3) array with the projected coordinates for each radius; float32 for float32 coords,
+             float64 otherwise
+    :raises ValueError: If any vertex misses any of the spheres
+    """
+    dtype = np.result_type(coords, np.float32)
+    radii = np.atleast_1d(np.asarray(radii, dtype=np.float64))
+    center = tuple(map(float, center))
+    point_light = tuple(map(float, point_light))
+    vert_count = len(coords)
+
+    if workers <= 1 or vert_count <= chunk_size:
+        points = np.empty((len(radii), vert_count, 3), dtype=dtype)
+        vertices_hit = _project_range(coords, points, 0, vert_count, center, radii, point_light, chunk_size)
+    else:
+        size = (1 + len(radii)) * vert_count * 3 * dtype.itemsize
+        fd, path = tempfile.mkstemp(prefix="stereographic_", suffix=".bin", dir=_shared_dir(size))
+        try:
+            try:
+                # reserve the blocks up front, so a filesystem that fills up meanwhile raises OSError here
+                if hasattr(os, "posix_fallocate"):
+                    os.posix_fallocate(fd, 0, size)
+            finally:
+                os.close(fd)
+            shared = np.memmap(path, dtype=dtype, mode='w+', shape=((1 + len(radii)) * vert_count, 3))
+            shared[:vert_count] = coords
+            points = shared[vert_count:].reshape(len(radii), vert_count, 3)
+
+            bounds = np.linspace(0, vert_count, workers + 1).astype(int)
+            tasks = [(path, dtype.str, vert_count, int(first), int(last), center, radii.tolist(), point_light,
+                      chunk_size)
+                     for first, last in zip(bounds[:-1], bounds[1:]) if last > first]
+            with multiprocessing.Pool(len(tasks)) as pool:
+                vertices_hit = np.sum(pool.starmap(_project_shared, tasks), axis=0)
+        finally:
+            _remove_shared(path)
+
+    missed = vert_count - int(vertices_hit.min()) if vert_count else 0
+    if missed:
+        raise ValueError(f"{missed} vertices do not intersect the sphere; "
+                         f"adjust the sphere diameter, wall thickness or point light")
+    return points
+
+
+def shell_topology(loop_starts, loop_totals, loop_verts, vert_count, edges=None, loop_edges=None):
+    """
+    Edges and polygons of the shell, which only depend on the source topology.
+
+    :param loop_starts: (F,) start of each source polygon in loop_verts
+    :param loop_totals: (F,) vertex count of each source polygon
+    :param loop_verts: (L,) vertex indices of all source polygons, concatenated
+    :param vert_count: Number of source vertices
+    :param edges: Optional (E, 2) source edges, doubled onto both surfaces
+    :param loop_edges: Optional (L,) edge index of every loop, see boundary_edges(...)
+    :return: Tuple (edges, loop_starts, loop_totals, loop_verts) of int32 arrays, wound as in shell_faces(...)
+    """
+    # Double up the mesh, joined by walls along the boundary: edges used by exactly one face
+    boundary = boundary_edges(loop_starts, loop_totals, loop_verts, loop_edges)
+    c_edges, starts, totals, verts = shell_faces(loop_starts, loop_totals, loop_verts, vert_count, boundary)
+    edges = np.zeros((0, 2), dtype=np.int32) if edges is None else np.asarray(edges, dtype=np.int32)
+    return np.concatenate((edges, edges + vert_count, c_edges)).astype(np.int32), starts, totals, verts
+
+
+def check_wall(radius, thickness):
+    """
+    The shell's winding (and the cached orientation) assumes the inner surface is inside the outer one; a zero
+    or negative thickness, or one reaching the center, would flip or collapse it.
+
+    :raises ValueError: Unless 0 < thickness < radius
+    """
+    if not 0 < thickness < radius:
+        raise ValueError(f"wall thickness must be greater than 0 and smaller than the sphere radius ({radius:g}), "
+                         f"got {thickness:g}")
+
+
+def stereographic_shell(coords, loop_starts, loop_totals, loop_verts, center, radius, thickness, point_light,
+                        edges=None, loop_edges=None, chunk_size=CHUNK_SIZE, workers=1):
+    """
+    Builds the closed shell of a source mesh projected onto a sphere of the given radius and wall thickness.
+
+    :param coords: (N, 3) source vertex coordinates
+    :param loop_starts: (F,) start of each source polygon in loop_verts
+    :param loop_totals: (F,) vertex count of each source polygon
+    :param loop_verts: (L,) vertex indices of all source polygons, concatenated
+    :param center: Center of the sphere
+    :param radius: Outer radius; the inner surface has radius - thickness
+    :param thickness: Wall thickness
+    :param point_light: Point every vertex is projected toward
+    :param edges: Optional (E, 2) source edges, doubled onto both surfaces
+    :param loop_edges: Optional (L,) edge index of every loop, see boundary_edges(...)
+    :param chunk_size: Number of vertices (or polygons) processed at a time
+    :param workers: Number of processes projecting the vertices, see project_vertices(...)
+    :return: Shell, with its polygons facing out of the shell and float32 coords for float32 sources
+    :raises ValueError: If any vertex misses the sphere, or the wall thickness is not within (0, radius)
+    """
+    check_wall(radius, thickness)
+    vert_count = len(coords)
+    # The (2, N, 3) result already is outer followed by inner; reshaping it does not copy
+    with gt_profile.phase("project", vertices=vert_count, surfaces=2):
+        points = project_vertices(coords, center, (radius, radius - thickness), point_light, chunk_size, workers)
+    shell_coords = points.reshape(-1, 3)
+    with gt_profile.phase("topology", polygons=len(loop_starts)):
+        shell_edges, starts, totals, verts = shell_topology(loop_starts, loop_totals, loop_verts, vert_count,
+                                                            edges, loop_edges)
+
+    # Make the normals point out of the shell (what Shift+N would do) with a single signed volume check
+    with gt_profile.phase("orient", polygons=len(starts)):
+        verts = orient_outward(shell_coords, starts, totals, verts, chunk_size)
+    return Shell(shell_coords, shell_edges, starts, totals, verts)
+
+
+def reproject_changed(snapshot, coords, shell_coords, center, radius, thickness, point_light):
+    """
+    Updates a shell in place for source vertices that moved, without touching the others.
+
+    Only the positions are updated; the polygons keep the winding chosen when the shell was built.
+
+    :param snapshot: (N, 3) source coordinates the shell was last built or updated from; updated in place
+    :param coords: (N, 3) current source coordinates
+    :param shell_coords: (2N, 3) shell coordinates (outer, then inner); updated in place
+    :param center: Center of the sphere
+    :param radius: Outer radius; the inner surface has radius - thickness
+    :param thickness: Wall thickness
+    :param point_light: Point every vertex is projected toward
+    :return: (K,) indices of the source vertices that moved
+    :raises ValueError: If a moved vertex misses the sphere; nothing is updated then
+    """
+    changed = np.flatnonzero(np.any(coords != snapshot, axis=1))
+    if not len(changed):
+        return changed
+
+    points, hit, _ = line_sphere_intersections(coords[changed], point_light, center, (radius, radius - thickness))
+    missed = len(changed) - int(np.count_nonzero(hit, axis=1).min())
+    if missed:
+        raise ValueError(f"{missed} vertices do not intersect the sphere; "
+                         f"adjust the sphere diameter, wall thickness or point light")
+
+    vert_count = len(snapshot)
+    shell_coords[changed] = points[0]
+    shell_coords[changed + vert_count] = points[1]
+    snapshot[changed] = coords[changed]
+    return changed
+
+
+def cluster_proxy(coords, loop_starts, loop_totals, loop_verts, ratio):
+    """
+    Decimates a mesh by vertex clustering, for previews.
+
+    Vertices are binned into a uniform grid sized so that about ratio * N cells are occupied, and every cell
+    becomes one vertex at the mean of its members. Polygons are remapped to the cells; corners that collapse
+    onto the next corner are dropped, and so are polygons left with fewer than three. The surviving polygons
+    keep their winding.
+
+    :param coords: (N, 3) vertex coordinates
+    :param loop_starts: (F,) start of each polygon in loop_verts
+    :param loop_totals: (F,) vertex count of each polygon
+    :param loop_verts: (L,) vertex indices of all polygons, concatenated
+    :param ratio: Wanted share of the vertex count, e.g. 1 / 16
+    :return: Tuple (coords, loop_starts, loop_totals, loop_verts) of the proxy, coords in the dtype of the
+             source coordinates
+    """
+    coords = np.asarray(coords)
+    loop_starts = np.asarray(loop_starts, dtype=np.intp)
+    loop_totals = np.asarray(loop_totals, dtype=np.intp)
+    if not len(coords):
+        return coords, loop_starts.astype(np.int32), loop_totals.astype(np.int32), np.asarray(loop_verts, np.int32)
+
+    # Cell size from the extent of the non-flat axes, so a plane is binned in 2D
+    low = coords.min(axis=0)
+    extent = coords.max(axis=0) - low
+    spread = extent > extent.max() * 1e-6
+    target = max(len(coords) * ratio, 1.0)
+    cell = (np.prod(extent[spread]) / target) ** (1 / max(int(spread.sum()), 1)) if spread.any() else 1.0
+    cells = np.where(spread, np.floor((coords - low) / cell), 0).astype(np.int64)
+
+    # Number the occupied cells and average their vertices
+    shape = cells.max(axis=0) + 1
+    ids = np.ravel_multi_index(cells.T, shape)
+    if np.prod(shape) <= 8 * len(ids):
+        # a dense grid is numbered with a running count, which beats sorting
+        occupied = np.zeros(np.prod(shape), dtype=bool)
+        occupied[ids] = True
+        cluster = (np.cumsum(occupied) - 1)[ids]
+    else:
+        cluster = np.unique(ids, return_inverse=True)[1].reshape(-1)
+    counts = np.bincount(cluster)
+    proxy = np.stack([np.bincount(cluster, coords[:, k]) / counts for k in range(3)], axis=1)
+    proxy = proxy.astype(np.result_type(coords, np.float32), copy=False)
+
+    # Remap the polygons and drop corners (then polygons) that collapsed
+    corners = polygon_edges(loop_starts, loop_totals, cluster[np.asarray(loop_verts)])
+    keep = corners[:, 0] != corners[:, 1]
+    polygon = np.repeat(np.arange(len(loop_starts)), loop_totals)
+    totals = np.bincount(polygon[keep], minlength=len(loop_starts))
+    keep &= (totals >= 3)[polygon]
+    totals = totals[totals >= 3].astype(np.int32)
+    starts = (np.cumsum(totals) - totals).astype(np.int32)
+    return proxy, starts, totals, corners[keep, 0].astype(np.int32)
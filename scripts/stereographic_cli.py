@@ -0,0 +1,135 @@
+"""
+Projects flat OBJ/PLY meshes into closed stereographic shells without Blender.
+
+    python stereographic_cli.py artwork.obj -o artwork_shell.ply
+    python stereographic_cli.py planes/*.ply -o shells/ --diameter 120 --thickness 3 --light 0 0 30
+
+Every input is projected with the same math as projection.py (projection_core.stereographic_shell), a chunk
+of vertices at a time, and written next to the input (or into --output) as <name>_stereographic.<ext>. A
+file that fails (e.g. vertices missing the sphere) is reported and skipped; the exit status is 1 if any did.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+import gt_profile
+from mesh_files import CHUNK_SIZE, READERS, MeshData, read_mesh, write_mesh
+from projection_cache import ProjectionCache
+from projection_core import cluster_proxy, stereographic_shell
+
+
+def output_path(source, output, fmt, single):
+    """
+    :param source: Input file path
+    :param output: --output value: a file (single input only), a directory, or None for next to the input
+    :param fmt: Output extension including the dot, or None to keep the input's
+    :param single: Whether this is the only input
+    :return: Path the shell of source is written to
+    """
+    stem, ext = os.path.splitext(os.path.basename(source))
+    ext = fmt or ext.lower()
+    if output and single and not os.path.isdir(output) and not output.endswith(os.sep):
+        return output
+    directory = output or os.path.dirname(source)
+    return os.path.join(directory, f"{stem}_stereographic{ext}")
+
+
+def project_file(source, target, center, radius, thickness, point_light, chunk_size=CHUNK_SIZE, workers=1,
+                 cache=None, preview=None, dtype=np.float64):
+    """
+    Reads a flat mesh, projects it into a closed shell and writes it.
+
+    :param cache: Optional ProjectionCache to reuse shell components from
+    :param preview: Project a vertex-clustered copy with about 1/preview of the vertices instead; None for all
+    :param dtype: dtype the coordinates are read and projected in; float32 halves the memory of the buffers
+
+    :return: Tuple (source vertex count, shell polygon count)
+    :raises ValueError: If any vertex misses the sphere, or a file cannot be read or written
+    """
+    with gt_profile.phase("read") as phase:
+        mesh = read_mesh(source, chunk_size, dtype)
+        phase.count(vertices=len(mesh.coords), polygons=len(mesh.loop_starts))
+    if preview:
+        with gt_profile.phase("proxy") as phase:
+            mesh = MeshData(*cluster_proxy(*mesh, 1 / preview))
+            phase.count(vertices=len(mesh.coords), polygons=len(mesh.loop_starts))
+    build_shell = stereographic_shell if cache is None else cache.shell
+    with gt_profile.phase("shell"):
+        shell = build_shell(mesh.coords, mesh.loop_starts, mesh.loop_totals, mesh.loop_verts,
+                            center, radius, thickness, point_light, chunk_size=chunk_size, workers=workers)
+    with gt_profile.phase("write", vertices=len(shell.coords), polygons=len(shell.loop_starts)):
+        write_mesh(target, shell, chunk_size)
+    return len(mesh.coords), len(shell.loop_starts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="OBJ or PLY files to project")
+    parser.add_argument("-o", "--output", help="output file (one input) or directory (default: next to each input)")
+    parser.add_argument("--format", choices=[ext[1:] for ext in READERS],
+                        help="output format (default: the input's, or the --output file's extension)")
+    parser.add_argument("--diameter", type=float, default=100.0, help="sphere diameter (default 100)")
+    parser.add_argument("--thickness", type=float, default=2.5, help="wall thickness (default 2.5)")
+    parser.add_argument("--light", type=float, nargs=3, default=(0.0, 0.0, 23.7), metavar=("X", "Y", "Z"),
+                        help="point light every vertex is projected toward (default 0 0 23.7)")
+    parser.add_argument("--center", type=float, nargs=3, metavar=("X", "Y", "Z"),
+                        help="sphere center (default 0 0 diameter/2, so the sphere rests on the XY plane)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help=f"vertices processed at a time; bounds the working memory (default {CHUNK_SIZE})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes projecting the vertices of each file; 0 uses every CPU (default 1)")
+    parser.add_argument("--cache-dir",
+                        help="keep projected surfaces and walls here and reuse them on later runs with the same "
+                             "sources, e.g. when only --thickness changes")
+    parser.add_argument("--preview", type=int, metavar="N",
+                        help="project a decimated copy with about 1/N of the vertices, for a quick look at the "
+                             "parameters before the full run")
+    parser.add_argument("--float32", action="store_true",
+                        help="keep the coordinates in float32 (as written) instead of float64, halving the memory "
+                             "of the vertex buffers; the intersections are still solved in float64")
+    parser.add_argument("--profile", action="store_true", help="print the time spent in each phase of every file")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="also write every file's phases to FILE as a Chrome trace (implies --profile)")
+    args = parser.parse_args(argv)
+
+    radius = args.diameter / 2
+    if not 0 < args.thickness < radius:
+        parser.error(f"--thickness must be greater than 0 and smaller than the sphere radius ({radius:g})")
+    center = args.center or (0.0, 0.0, radius)
+    fmt = "." + args.format if args.format else None
+    workers = args.workers or os.cpu_count() or 1
+    cache = ProjectionCache(args.cache_dir) if args.cache_dir else None
+    if args.output and len(args.inputs) > 1:
+        os.makedirs(args.output, exist_ok=True)
+    if args.profile or args.trace:
+        gt_profile.enable(args.trace)
+
+    failed = 0
+    for source in args.inputs:
+        target = output_path(source, args.output, fmt, len(args.inputs) == 1)
+        start = time.perf_counter()
+        profile = gt_profile.start(os.path.basename(source))
+        try:
+            verts, polygons = project_file(source, target, center, radius, args.thickness, args.light,
+                                           args.chunk_size, workers, cache, args.preview,
+                                           np.float32 if args.float32 else np.float64)
+        except (OSError, ValueError) as e:
+            profile.finish()
+            failed += 1
+            print(f"{source}: {e}", file=sys.stderr)
+            continue
+        print(f"{source} -> {target}: {verts} vertices, {polygons} faces, {time.perf_counter() - start:.2f} s")
+        summary = profile.finish()
+        if summary:
+            print(" ", summary)
+
+    if cache is not None:
+        print("cache:", cache.summary())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())